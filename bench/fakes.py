@@ -0,0 +1,269 @@
+"""
+Local stand-ins for everything the pipelines talk to: one HTTP server for
+TradingView charts/screener, NSE and ETMoney, an in-memory gspread, and a
+stub LLM. All of them count the calls they receive.
+"""
+import os, json, time, zlib, threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+STATIC_BODY = "/* bench asset */" + " " * 50000  # Stands in for a 50 KB image/font/script
+
+SECTORS = ["Banks", "Pharmaceuticals", "IT - Software", "Cement", "Auto Components",
+           "Finance", "Chemicals", "Power", "Realty", "FMCG", "Telecom", "Steel"]
+ALIASES = {"Banks": "Banking", "IT - Software": "Software", "Pharmaceuticals": "Pharma",
+           "Auto Components": "Automobile", "Finance": "NBFC", "Realty": "Real Estate"}
+
+
+def sector_of(symbol):
+    return SECTORS[zlib.crc32(symbol.encode()) % len(SECTORS)]
+
+
+def symbols(n):
+    return [f"BENCH{k:04d}" for k in range(n)]
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class FakeServer:
+    """
+    ThreadingHTTPServer on 127.0.0.1 serving:
+      GET  /chart/?symbol=NSE:XXX   TradingView chart fixture
+      GET  /api/switch              hit by the fixture's in-page symbol change
+      POST /scan                    screener JSON for the requested tickers
+      GET  /                        NSE home (sets the cookie the API wants)
+      GET  /api/quote-equity        NSE JSON; 401 without cookie, 404 for every `nse_miss_every`-th symbol
+      GET  /stocks/<slug>           ETMoney stock fixture
+      GET  /static/...              images, fonts, trackers the chart fixture pulls in (what blocking should drop)
+    `latency_ms` is added to every response, `render_ms` is the in-page JS render delay.
+    """
+
+    def __init__(self, latency_ms=0, render_ms=150, nse_miss_every=0):
+        self.latency_ms, self.render_ms, self.nse_miss_every = latency_ms, render_ms, nse_miss_every
+        self.hits = Counter()
+        self.bytes = Counter()  # route -> response bytes
+        self._lock = threading.Lock()
+        self._pages = {name: _fixture(name) for name in
+                       ("tradingview_chart.html", "etmoney_stock.html", "nse_home.html")}
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def hit(self, route, nbytes=0):
+        with self._lock:
+            self.hits[route] += 1
+            self.bytes[route] += nbytes
+
+    def nse_has(self, symbol):
+        if not self.nse_miss_every:
+            return True
+        return zlib.crc32(symbol.encode()) % self.nse_miss_every != 0
+
+    def page(self, name, symbol, sector=""):
+        return (self._pages[name].replace("{{SYMBOL}}", symbol).replace("{{SECTOR}}", sector)
+                .replace("{{RENDER_MS}}", str(self.render_ms)))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, ctype="text/html; charset=utf-8", headers=()):
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000)
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in headers:
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                qs = parse_qs(url.query)
+                if url.path.startswith("/static/"):
+                    server.hit("static", len(STATIC_BODY))
+                    ctype = "application/javascript" if url.path.endswith(".js") else "application/octet-stream"
+                    return self._send(200, STATIC_BODY, ctype)
+                if url.path.startswith("/chart"):
+                    server.hit("tv_chart")
+                    symbol = unquote(qs.get("symbol", ["NSE:UNKNOWN"])[0]).split(":")[-1]
+                    page = server.page("tradingview_chart.html", symbol)
+                    server.bytes["tv_chart"] += len(page)
+                    return self._send(200, page)
+                if url.path == "/api/switch":
+                    server.hit("tv_switch")  # In-page symbol change (the real app pulls data over its websocket)
+                    return self._send(200, "{}", "application/json")
+                if url.path.startswith("/stocks/"):
+                    server.hit("etmoney_page")
+                    symbol = url.path.split("/")[2].split("-")[0].upper()
+                    return self._send(200, server.page("etmoney_stock.html", symbol,
+                                                       ALIASES.get(sector_of(symbol), sector_of(symbol))))
+                if url.path == "/api/quote-equity":
+                    server.hit("nse_api")
+                    if "nsit=" not in (self.headers.get("Cookie") or ""):
+                        return self._send(401, "{}", "application/json")
+                    symbol = qs.get("symbol", [""])[0]
+                    if not server.nse_has(symbol):
+                        return self._send(404, "{}", "application/json")
+                    body = {"info": {"symbol": symbol, "industry": sector_of(symbol)}}
+                    return self._send(200, json.dumps(body), "application/json")
+                if url.path == "/":
+                    server.hit("nse_home")
+                    return self._send(200, server.page("nse_home.html", ""),
+                                      headers=[("Set-Cookie", "nsit=bench; Path=/")])
+                server.hit("not_found")
+                self._send(404, "not found", "text/plain")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if urlparse(self.path).path != "/scan":
+                    server.hit("not_found")
+                    return self._send(404, "not found", "text/plain")
+                server.hit("tv_scan")
+                columns = payload.get("columns") or []
+                data = []
+                for t in (payload.get("symbols") or {}).get("tickers") or []:
+                    seed = zlib.crc32(t.encode()) % 997
+                    data.append({"s": t, "d": [seed + n * 13.37 for n in range(len(columns))]})
+                self._send(200, json.dumps({"totalCount": len(data), "data": data}), "application/json")
+
+        return Handler
+
+
+# ---------------- GSPREAD ---------------- #
+class Calls:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.rows_written = Counter()  # worksheet title -> rows written
+        self.cells_written = Counter()  # worksheet title -> cells written
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.rows_written.clear()
+            self.cells_written.clear()
+
+    def add(self, name, rows=0, sheet="", cells=0):
+        with self._lock:
+            self.counts[name] += 1
+            if rows:
+                self.rows_written[sheet] += rows
+            self.cells_written[sheet] += cells
+
+
+def _a1(cell):
+    """"C12" -> (2, 12)."""
+    letters = "".join(ch for ch in cell if ch.isalpha())
+    col = 0
+    for ch in letters.upper():
+        col = col * 26 + ord(ch) - ord("A") + 1
+    return col - 1, int("".join(ch for ch in cell if ch.isdigit()))
+
+
+class FakeWorksheet:
+    def __init__(self, title, rows, calls):
+        self.title, self.rows, self.calls = title, [list(r) for r in rows], calls
+        self.written = {}  # row number -> values
+
+    def get_all_values(self):
+        self.calls.add("get_all_values")
+        return [list(r) for r in self.rows]
+
+    def get(self, a1):
+        self.calls.add("get")
+        first, last = a1.split(":")
+        (c0, r0), (c1, r1) = _a1(first), _a1(last)
+        return [list(row[c0:c1 + 1]) for row in self.rows[r0 - 1:r1]]
+
+    def batch_update(self, data, **kwargs):
+        n = cells = 0
+        for item in data:
+            col, start = _a1(item["range"].split(":")[0])
+            for k, values in enumerate(item["values"]):
+                self.written.setdefault(start + k, []).append((col, values))
+                row = self._row(start + k)
+                row.extend([""] * max(0, col + len(values) - len(row)))
+                row[col:col + len(values)] = values
+                cells += len(values)
+            n += len(item["values"])
+        self.calls.add("batch_update", n, self.title, cells)
+
+    def _row(self, row_no):
+        while len(self.rows) < row_no:
+            self.rows.append([])
+        return self.rows[row_no - 1]
+
+    def update(self, *args, **kwargs):
+        self.calls.add("update", 1, self.title)
+
+
+class FakeSpreadsheet:
+    def __init__(self, client):
+        self.client, self.sheets = client, {}
+
+    def worksheet(self, name):
+        self.client.calls.add("worksheet")
+        if name not in self.sheets:
+            self.sheets[name] = FakeWorksheet(name, self.client.seed.get(name, []), self.client.calls)
+        return self.sheets[name]
+
+
+class FakeGspread:
+    """gspread client stand-in: every spreadsheet URL shares one workbook seeded with `seed` {title: rows}."""
+
+    def __init__(self, seed):
+        self.seed, self.calls = seed, Calls()
+        self.book = FakeSpreadsheet(self)
+
+    def open_by_url(self, url):
+        self.calls.add("open_by_url")
+        return self.book
+
+    def install(self):
+        import gspread
+        gspread.service_account_from_dict = lambda *a, **k: self
+        gspread.service_account = lambda *a, **k: self
+        return self
+
+
+# ---------------- LLM ---------------- #
+class StubLLM:
+    """llm(messages) -> (text, headers, tokens): answers every symbol of a batched prompt."""
+
+    def __init__(self, latency_ms=300, ms_per_item=20):
+        self.latency_ms, self.ms_per_item = latency_ms, ms_per_item
+        self.calls = self.items = 0
+        self.durations = []  # (seconds, n_items) per call
+
+    def __call__(self, messages):
+        t0 = time.monotonic()
+        items = json.loads(messages[-1]["content"].split("\n", 1)[1])
+        time.sleep((self.latency_ms + self.ms_per_item * len(items)) / 1000)
+        self.calls += 1
+        self.items += len(items)
+        results = [{"symbol": r["symbol"], "sector": sector_of(r["symbol"]), "scope": "Steady demand outlook"}
+                   for r in items]
+        self.durations.append((time.monotonic() - t0, len(items)))
+        headers = {"x-ratelimit-remaining-tokens": "100000", "x-ratelimit-reset-tokens": "1s"}
+        return json.dumps({"results": results}), headers, 60 * len(items)
@@ -0,0 +1,229 @@
+"""
+Offline benchmark for the three pipelines: run_scraper.py (tv), etmoney_scraper.py
+(etmoney) and sector_fixer.py (fixer), end to end against bench/fakes.py - no
+TradingView, NSE, ETMoney, Groq or Google Sheets traffic.
+
+    python bench/run_bench.py                          # all pipelines, 100 symbols
+    python bench/run_bench.py --pipelines tv --rows 300 --browser on
+    python bench/run_bench.py --json bench_result.json # keep numbers to compare runs
+    python bench/run_bench.py --pipelines etmoney --rerun  # second run over unchanged sheet data
+
+Each pipeline runs in its own process and temp directory (fresh journal, caches,
+memo), so env-driven config and module state never leak between them. Chrome
+pages are only exercised when a chromedriver is found (--browser auto); without
+one the tv pipeline runs in BULK_MODE and NSE answers every symbol.
+"""
+import os, sys, glob, json, time, shutil, argparse, tempfile, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PIPELINES = ("tv", "etmoney", "fixer")
+BULK_COLUMNS = "open,high,low,close,volume,change"
+BULK_COLUMNS_14 = BULK_COLUMNS + ",VWAP,ATR,RSI,market_cap_basic,price_earnings_ttm,dividend_yield_recent,beta_1_year,Perf.W"
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def chromedriver():
+    return os.getenv("CHROMEDRIVER") or shutil.which("chromedriver")
+
+
+def timed(fn, latencies):
+    def wrapper(*args, **kwargs):
+        t0 = time.monotonic()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(time.monotonic() - t0)
+    return wrapper
+
+
+# ---------------- WORKER (one pipeline, inside its temp dir) ---------------- #
+def seed_sheets(server, n):
+    from fakes import symbols, sector_of, ALIASES, SECTORS
+    sheet1 = [["Symbol", "Stock Name", "TV", "Link1"]]
+    sheet9 = [["Symbol", "NSE Sector", "ETMoney Sector", "Final Sector", "Future Scope"]]
+    for k, sym in enumerate(symbols(n)):
+        sheet1.append([sym, f"{sym} Ltd", "TV", f"{server.url}/chart/?symbol=NSE%3A{sym}"])
+        b = sector_of(sym)
+        c = SECTORS[(SECTORS.index(b) + 1) % len(SECTORS)] if k % 3 == 0 else ALIASES.get(b, b)
+        sheet9.append([sym, b, c, ""])
+    return {"Sheet1": sheet1, "Sheet9": sheet9}
+
+
+def run_tv(args, server, sheets, browser):
+    os.environ.update({
+        "START_INDEX": "0", "END_INDEX": str(args.rows - 1), "CONCURRENCY": str(args.concurrency),
+        "BULK_MODE": "0" if browser else "1", "TV_SCAN_URL": server.url + "/scan",
+        "BULK_COLUMNS": BULK_COLUMNS, "BULK_COLUMNS_14": BULK_COLUMNS_14,
+    })
+    import run_scraper
+    latencies, original = [], run_scraper.scrape_in_order
+
+    def scrape_in_order(fn, jobs, concurrency=run_scraper.CONCURRENCY):
+        return original(timed(fn, latencies), jobs, concurrency)
+
+    run_scraper.scrape_in_order = scrape_in_order
+    run_scraper.main([])
+    return latencies, sheets.calls.rows_written["Sheet5"]
+
+
+def run_etmoney(args, server, sheets, browser):
+    os.environ.update({"CHUNK_START": "0", "CHUNK_END": str(args.rows)})
+    server.nse_miss_every = args.nse_miss_every if browser else 0
+    import etmoney_scraper as etm
+    if not browser:
+        etm.get_driver = lambda: None
+
+    per_symbol = {}
+
+    def add(fn):
+        def wrapper(*a):
+            t0 = time.monotonic()
+            try:
+                return fn(*a)
+            finally:
+                symbol = a[-1]
+                per_symbol[symbol] = per_symbol.get(symbol, 0.0) + time.monotonic() - t0
+        return wrapper
+
+    etm.NSE.sector = add(etm.NSE.sector)
+    etm.scrape_sector_direct = add(etm.scrape_sector_direct)
+    etm.main([])
+    return list(per_symbol.values()), sheets.calls.rows_written["Sheet6"]
+
+
+def run_fixer(args, server, sheets, browser):
+    from fakes import StubLLM
+    import sector_fixer
+    llm = StubLLM(latency_ms=args.llm_ms)
+    sector_fixer.main(sheet=sheets.open_by_url("").worksheet("Sheet9"), llm=llm)
+    sheets.calls.counts["llm"] = llm.calls
+    # Time each symbol sent to the model waited for its answer
+    return [d for d, n in llm.durations for _ in range(n)], sheets.calls.rows_written["Sheet9"]
+
+
+def worker(args):
+    sys.path.insert(0, ROOT)
+    from fakes import FakeServer, FakeGspread
+
+    browser = args.browser == "on" or (args.browser == "auto" and chromedriver() is not None)
+    with FakeServer(latency_ms=args.latency_ms, render_ms=args.render_ms) as server:
+        for var in ("SHARD_INDEX", "SHARD_STEP", "LEASE_DB", "JOURNAL_FILE", "JOURNAL_FILE_14"):
+            os.environ.pop(var, None)
+        os.environ.update({
+            "GSPREAD_CREDENTIALS": "{}", "COOKIES_FILE": "no_cookies.json",
+            "NSE_BASE_URL": server.url, "ETMONEY_BASE_URL": server.url,
+            # No driver downloads; without a browser the pool never starts Chrome anyway
+            "CHROMEDRIVER": chromedriver() or "chromedriver",
+        })
+        sheets = FakeGspread(seed_sheets(server, args.rows)).install()
+
+        runner = {"tv": run_tv, "etmoney": run_etmoney, "fixer": run_fixer}[args.worker]
+        if args.rerun:  # Warm-up run fills the destination sheet; only the identical second run is measured
+            runner(args, server, sheets, browser)
+            for path in glob.glob("journal*.jsonl"):
+                os.remove(path)
+            sheets.calls.reset()
+            server.hits.clear()
+            server.bytes.clear()
+        t0 = time.monotonic()
+        latencies, rows = runner(args, server, sheets, browser)
+        seconds = time.monotonic() - t0
+        if args.rerun:
+            rows = args.rows  # Rows covered, most of them (rightly) not rewritten
+
+        calls = {f"http.{k}": v for k, v in server.hits.items()}
+        http_bytes = sum(server.bytes.values())
+        calls.update({f"sheets.{k}": v for k, v in sheets.calls.counts.items() if k != "llm"})
+        calls["sheets.cells_written"] = sum(sheets.calls.cells_written.values())
+        if "llm" in sheets.calls.counts:
+            calls["llm"] = sheets.calls.counts["llm"]
+
+    result = {
+        "pipeline": args.worker, "browser": browser, "rows": rows, "seconds": round(seconds, 2),
+        "rows_per_min": round(rows / seconds * 60, 1) if seconds else 0.0,
+        "p50": round(percentile(latencies, 50), 3), "p95": round(percentile(latencies, 95), 3),
+        "http_bytes": http_bytes, "calls": calls, "calls_per_row": {k: round(v / rows, 3) for k, v in calls.items()} if rows else {},
+    }
+    print("BENCH_RESULT " + json.dumps(result), flush=True)
+
+
+# ---------------- DRIVER (spawns one worker per pipeline) ---------------- #
+def run_pipeline(name, args):
+    tmp = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", name] + [
+        f"--{k.replace('_', '-')}={v}" for k, v in vars(args).items()
+        if k in ("rows", "concurrency", "latency_ms", "render_ms", "llm_ms", "nse_miss_every", "browser")]
+    cmd += ["--rerun"] if args.rerun else []
+    try:
+        proc = subprocess.run(cmd, cwd=tmp, capture_output=True, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        print(f"❌ {name}: timed out after {args.timeout}s")
+        return None
+    finally:
+        if not args.keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+    if args.verbose:
+        print(proc.stdout)
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    print(f"❌ {name}: no result (exit {proc.returncode})\n{proc.stdout[-2000:]}{proc.stderr[-2000:]}")
+    return None
+
+
+def report(result):
+    print(f"\n📈 {result['pipeline']} ({'chrome' if result['browser'] else 'no browser'})")
+    print(f"   {result['rows']} rows in {result['seconds']:.1f}s → {result['rows_per_min']:.1f} rows/min")
+    print(f"   per-symbol latency p50 {result['p50']:.3f}s | p95 {result['p95']:.3f}s")
+    if result.get("http_bytes"):
+        print(f"   {result['http_bytes'] / 1024:.0f} KB of fixture pages/assets served")
+    for name, per_row in sorted(result["calls_per_row"].items()):
+        print(f"   {name:<24} {result['calls'][name]:>6}  ({per_row:.3f}/row)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help="Comma list of tv, etmoney, fixer")
+    parser.add_argument("--rows", type=int, default=100, help="Symbols in the fake Sheet1/Sheet9")
+    parser.add_argument("--concurrency", type=int, default=1, help="CONCURRENCY for run_scraper.py")
+    parser.add_argument("--latency-ms", type=int, default=50, help="Added to every fake HTTP response")
+    parser.add_argument("--render-ms", type=int, default=150, help="In-page render delay of the HTML fixtures")
+    parser.add_argument("--llm-ms", type=int, default=300, help="Stub LLM latency per call")
+    parser.add_argument("--nse-miss-every", type=int, default=5, help="NSE 404s ~1 in N symbols (browser runs)")
+    parser.add_argument("--browser", choices=("auto", "on", "off"), default="auto")
+    parser.add_argument("--timeout", type=int, default=1800, help="Per-pipeline timeout (seconds)")
+    parser.add_argument("--rerun", action="store_true", help="Measure a second run over the data the first one wrote")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the per-pipeline temp dirs")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    parser.add_argument("--worker", choices=PIPELINES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return worker(args)
+
+    results = []
+    for name in [p.strip() for p in args.pipelines.split(",") if p.strip()]:
+        if name not in PIPELINES:
+            parser.error(f"unknown pipeline {name!r}")
+        print(f"⏱️ Benchmarking {name} ({args.rows} symbols)...")
+        result = run_pipeline(name, args)
+        if result:
+            report(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    return 0 if len(results) == len(args.pipelines.split(",")) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
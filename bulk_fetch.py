@@ -0,0 +1,85 @@
+import os, json, re
+from urllib.parse import urlparse, parse_qs, unquote
+import requests
+from tradingview_screener import Query
+from tradingview_screener.query import HEADERS
+
+# ---------------- CONFIG ---------------- #
+BULK_MODE     = os.getenv("BULK_MODE", "0") == "1"       # Screener first, Selenium only for misses
+SCAN_URL      = os.getenv("TV_SCAN_URL", "")             # Override to hit a local stand-in server
+BULK_CHUNK    = int(os.getenv("BULK_CHUNK", "500"))      # Tickers per HTTP query
+BULK_EXCHANGE = os.getenv("BULK_EXCHANGE", "NSE")        # Used when the chart URL has no symbol
+COOKIES_FILE  = os.getenv("COOKIES_FILE", "cookies.json")
+
+
+def columns_from_env(var, default=""):
+    """Screener column names, in the same order as the chart's value panel."""
+    return [c.strip() for c in os.getenv(var, default).split(",") if c.strip()]
+
+
+def ticker_from_url(url, name=""):
+    """'...chart/?symbol=NSE%3ARELIANCE' or '.../symbols/NSE-RELIANCE/' -> 'NSE:RELIANCE'."""
+    if url:
+        qs = parse_qs(urlparse(url).query)
+        if qs.get("symbol"):
+            return unquote(qs["symbol"][0]).upper()
+        m = re.search(r"/symbols/([A-Z0-9_]+)-([A-Z0-9_.&\-]+?)/?$", urlparse(url).path, re.I)
+        if m:
+            return f"{m.group(1)}:{m.group(2)}".upper()
+    name = (name or "").strip().upper()
+    return f"{BULK_EXCHANGE}:{name}" if name else ""
+
+
+def _cookies():
+    if not os.path.exists(COOKIES_FILE):
+        return None
+    with open(COOKIES_FILE, "r") as f:
+        return {c.get("name"): c.get("value") for c in json.load(f)}
+
+
+def http_transport(url, payload):
+    """Default transport: POST the scan query, return the decoded JSON body."""
+    r = requests.post(url, json=payload, headers=HEADERS, cookies=_cookies(), timeout=20)
+    r.raise_for_status()
+    return r.json()
+
+
+def format_value(v):
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        return f"{v:.2f}"
+    return str(v)
+
+
+def bulk_fetch(jobs, columns, transport=http_transport, url=SCAN_URL, chunk=BULK_CHUNK):
+    """
+    jobs: [(i, row)] with the name in row[0] and the chart URL in row[3].
+    Returns {i: [value, ...]} for every row the screener resolved; the rest
+    are left for the Selenium path.
+    """
+    tickers = {}
+    for i, row in jobs:
+        t = ticker_from_url(row[3] if len(row) > 3 else "", row[0] if row else "")
+        if t:
+            tickers.setdefault(t, []).append(i)
+
+    found, names = {}, list(tickers)
+    for n in range(0, len(names), chunk):
+        part = names[n:n + chunk]
+        q = Query().select(*columns).set_tickers(*part).limit(len(part))
+        try:
+            data = transport(url or q.url, q.query)
+        except Exception as e:
+            print(f"⚠️ Bulk query failed ({len(part)} tickers): {e}")
+            continue
+        for item in data.get("data") or []:
+            values = item.get("d") or []
+            if not any(v is not None for v in values):
+                continue
+            for i in tickers.get(item.get("s", "").upper(), []):
+                found[i] = [format_value(v) for v in values]
+
+    print(f"📦 Bulk screener: {len(found)}/{len(jobs)} rows resolved in "
+          f"{(len(names) + chunk - 1) // chunk} queries")
+    return found
@@ -0,0 +1,129 @@
+import os, time, weakref, threading
+from timing import TIMINGS
+
+# ---------------- CONFIG ---------------- #
+SYMBOL_SWITCH   = os.getenv("SYMBOL_SWITCH", "1") == "1"           # Reuse the loaded chart app between symbols
+SWITCH_TIMEOUT  = float(os.getenv("SWITCH_TIMEOUT", "8"))          # Then fall back to a full driver.get
+SWITCH_STABLE_MS = int(os.getenv("SWITCH_STABLE_MS", "400"))
+SWITCH_MAX_FAILS = int(os.getenv("SWITCH_MAX_FAILS", "3"))        # Consecutive failures before giving up on switching
+PANEL_PROBE     = "div[class*='valueValue']"
+BLOCK_MARKERS   = ("captcha", "just a moment", "access denied", "unusual traffic", "are you a robot")
+
+# Asks the already-booted chart app to change symbol, then resolves once the
+# value panel holds NEW, stable text and the app confirms the new symbol:
+# chart.symbol() when the API is there, else an exact token of the page title.
+# The URL is never proof (the history fallback pushes it itself), and changing
+# values alone aren't either (the old symbol keeps ticking). Tries the app's own
+# API first, then a history push the router picks up; unconfirmed = driver.get.
+SWITCH_JS = r"""
+const [ticker, url, probe, stableMs, timeoutMs, done] = arguments;
+const t0 = performance.now();
+const full = ticker.toUpperCase(), name = full.split(":").pop();
+const read = () => Array.from(document.querySelectorAll(probe), el => (el.textContent || "").trim());
+const before = JSON.stringify(read());
+const isTicker = s => { s = String(s || "").toUpperCase(); return s === full || s === name; };
+const activeChart = () => {
+  const api = window.TradingViewApi || window.tvWidget;
+  return api && (api.activeChart ? api.activeChart() : api.chart && api.chart());
+};
+// true/false from the app itself, null when it can't tell
+const appSymbol = () => {
+  try {
+    const chart = activeChart();
+    return chart && chart.symbol ? isTicker(chart.symbol()) : null;
+  } catch (e) { return null; }
+};
+const titleNames = () => document.title.split(/[\s,|·()\u2013\u2014]+/).some(isTicker);
+let method = null;
+
+try {
+  const chart = activeChart();
+  if (chart && chart.setSymbol) { chart.setSymbol(ticker); method = "api"; }
+} catch (e) {}
+if (!method) {
+  try {
+    history.pushState(null, "", url);
+    window.dispatchEvent(new PopStateEvent("popstate"));
+    method = "history";
+  } catch (e) {}
+}
+if (!method) { done({ok: false, method: null, ms: 0}); return; }
+
+let last = null, lastChange = t0;
+const timer = setInterval(() => {
+  const values = read(), key = JSON.stringify(values), now = performance.now();
+  if (key !== last) { last = key; lastChange = now; }
+  const app = appSymbol();
+  const named = app === null ? titleNames() : app;
+  const filled = values.filter(v => v && v !== "∅").length > 0;
+  if (key !== before && filled && named && now - lastChange >= stableMs) {
+    clearInterval(timer); done({ok: true, method: method, ms: now - t0});
+  } else if (now - t0 >= timeoutMs) {
+    clearInterval(timer); done({ok: false, method: method, ms: now - t0});
+  }
+}, 50);
+"""
+
+
+class SwitchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.switched = self.navigated = self.fallbacks = 0
+        self.streak = 0  # Failed switches in a row
+
+    def add(self, kind):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+            self.streak = self.streak + 1 if kind == "fallbacks" else 0 if kind == "switched" else self.streak
+
+    def summary(self):
+        return (f"🔀 Symbol switch: {self.switched} in-page, {self.navigated} full loads "
+                f"({self.fallbacks} after a failed switch)")
+
+
+STATS = SwitchStats()
+_loaded = weakref.WeakKeyDictionary()  # driver -> True once the chart app is booted
+
+
+def looks_blocked(driver):
+    """True when the page is a CAPTCHA / bot wall instead of a chart."""
+    try:
+        text = f"{driver.title} {driver.current_url}".lower()
+    except Exception:
+        return False
+    return any(marker in text for marker in BLOCK_MARKERS)
+
+
+def switch_symbol(driver, ticker, url, probe=PANEL_PROBE, timeout=SWITCH_TIMEOUT, stable_ms=SWITCH_STABLE_MS):
+    """Change symbol inside the loaded chart. -> (ok, method, seconds)"""
+    driver.set_script_timeout(timeout + 5)
+    t0 = time.monotonic()
+    try:
+        res = driver.execute_async_script(SWITCH_JS, ticker, url, probe, stable_ms, int(timeout * 1000)) or {}
+    except Exception:
+        res = {}
+    return bool(res.get("ok")), res.get("method"), time.monotonic() - t0
+
+
+def open_chart(driver, url, ticker, probe=PANEL_PROBE, enabled=SYMBOL_SWITCH):
+    """
+    Show `ticker` in this driver: an in-page switch when the chart app is
+    already up, a full driver.get(url) the first time or when the switch fails.
+    -> "switch" | "navigate"
+    """
+    if enabled and ticker and _loaded.get(driver) and STATS.streak < SWITCH_MAX_FAILS:
+        with TIMINGS.phase("switch"):
+            ok, method, _ = switch_symbol(driver, ticker, url, probe)
+        if ok:
+            STATS.add("switched")
+            return "switch"
+        STATS.add("fallbacks")
+        print(f"  🔁 In-page switch to {ticker} failed ({method or 'no hook'}), reloading")
+        if STATS.streak >= SWITCH_MAX_FAILS:
+            print(f"  🔁 {SWITCH_MAX_FAILS} failed switches in a row, full loads from now on")
+    _loaded.pop(driver, None)
+    with TIMINGS.phase("page_load"):
+        driver.get(url)
+    _loaded[driver] = True
+    STATS.add("navigated")
+    return "navigate"
@@ -0,0 +1,270 @@
+import os, time, signal, threading
+from collections import Counter
+from contextlib import contextmanager
+from selenium.common.exceptions import TimeoutException
+from timing import TIMINGS
+
+# ---------------- CONFIG ---------------- #
+SYMBOL_DEADLINE = float(os.getenv("SYMBOL_DEADLINE", "90"))  # Wall-clock seconds per symbol, wherever it hangs; 0 = off
+CHROME_RSS_MB   = float(os.getenv("CHROME_RSS_MB", "1500"))  # chromedriver + Chrome + renderers, per driver; 0 = off
+WATCHDOG_TICK   = float(os.getenv("WATCHDOG_TICK", "2"))     # Seconds between checks
+QUIT_TIMEOUT    = float(os.getenv("QUIT_TIMEOUT", "15"))     # driver.quit() slower than this -> kill the tree
+REAP_EVERY      = float(os.getenv("REAP_EVERY", "60"))       # Seconds between orphan sweeps
+REAP_GRACE      = float(os.getenv("REAP_GRACE", "120"))      # Untracked Chrome this young may still be starting
+
+CHROME_NAMES = ("chrome", "chromium", "headless_shell")
+AUTOMATION_MARKERS = ("--remote-debugging-port", "--test-type=webdriver", ".org.chromium.Chromium", ".com.google.Chrome")
+
+
+class DeadlineExceeded(TimeoutException):
+    """The watchdog killed the driver under a symbol that ran past SYMBOL_DEADLINE."""
+
+
+def _psutil():
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        return None
+
+
+def driver_pid(driver):
+    """chromedriver pid behind a webdriver.Chrome (Chrome itself is its child)."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def _is_chrome(proc):
+    """chromedriver, or a Chrome started by one (never the user's own browser)."""
+    try:
+        name = proc.name().lower()
+        if "chromedriver" in name:
+            return True
+        if not any(n in name for n in CHROME_NAMES):
+            return False
+        return any(m in arg for arg in proc.cmdline() for m in AUTOMATION_MARKERS)
+    except Exception:
+        return False
+
+
+class _Guard:
+    def __init__(self, pid, label, symbol, deadline):
+        self.pid, self.label, self.symbol = pid, label, symbol
+        self.t0 = time.monotonic()
+        self.deadline = self.t0 + deadline if deadline else None
+        self.killed = None  # Reason, once the watchdog pulled the plug
+
+
+class Watchdog:
+    """
+    Supervises every pooled Chrome from one background thread:
+
+    - a symbol still running after `deadline` seconds gets its chromedriver
+      and Chrome killed, which unblocks the worker (even inside driver.get)
+      with DeadlineExceeded; the pool replaces the driver
+    - the RSS of each driver's process tree is sampled every tick; a tree
+      over `rss_mb` is recycled once its current symbol finishes
+    - chromedriver/Chrome processes nobody tracks any more are reaped
+    - driver.quit() is bounded by QUIT_TIMEOUT
+
+    Every action is a TIMINGS event, so it lands in run_summary.json.
+    Without psutil only the deadline works (chromedriver alone is killed).
+
+        with WATCHDOG.watch(driver, "driver 0"):
+            driver.get(url)
+    """
+
+    def __init__(self, deadline=SYMBOL_DEADLINE, rss_mb=CHROME_RSS_MB, tick=WATCHDOG_TICK,
+                 quit_timeout=QUIT_TIMEOUT, reap_every=REAP_EVERY, reap_grace=REAP_GRACE):
+        self.deadline, self.rss_mb, self.tick = deadline, rss_mb, tick
+        self.quit_timeout, self.reap_every, self.reap_grace = quit_timeout, reap_every, reap_grace
+        self.actions = Counter()  # deadline / rss / quit_hung / reaped
+        self.peak_mb = 0.0
+        self._guards = set()
+        self._drivers = {}   # chromedriver pid -> label
+        self._over = {}      # chromedriver pid -> MB, recycle after the current symbol
+        self._lock = threading.Lock()
+        self._thread = None
+        self._warned = False
+
+    # ---- pool hooks ----
+    def track(self, driver, label):
+        pid = driver_pid(driver)
+        if pid is None:
+            return
+        with self._lock:
+            self._drivers[pid] = label
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chrome-watchdog", daemon=True)
+                self._thread.start()
+
+    @contextmanager
+    def watch(self, driver, label):
+        """One symbol on `driver`, under the wall-clock deadline."""
+        rec = TIMINGS.current()
+        guard = _Guard(driver_pid(driver), label, rec.symbol if rec else "", self.deadline)
+        with self._lock:
+            self._guards.add(guard)
+        try:
+            yield guard
+        except Exception as e:
+            if guard.killed:
+                raise DeadlineExceeded(f"{guard.killed} ({label})") from e
+            raise
+        finally:
+            with self._lock:
+                self._guards.discard(guard)
+
+    def over_limit(self, driver):
+        """MB when the driver's tree went over the RSS ceiling, else None."""
+        with self._lock:
+            return self._over.get(driver_pid(driver))
+
+    def quit(self, driver):
+        """driver.quit(), killing the process tree when it hangs or leaves it behind."""
+        pid = driver_pid(driver)
+        done = threading.Event()
+
+        def _quit():
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            done.set()
+
+        threading.Thread(target=_quit, name="chrome-quit", daemon=True).start()
+        if not done.wait(self.quit_timeout):
+            self.kill(pid, "quit_hung", f"driver.quit() hung > {self.quit_timeout:.0f}s")
+        with self._lock:
+            self._drivers.pop(pid, None)
+            self._over.pop(pid, None)
+
+    # ---- actions ----
+    def kill(self, pid, kind, reason, **info):
+        """Kill chromedriver `pid` and everything under it; recorded as a run event."""
+        if pid is None:
+            return 0
+        with self._lock:
+            self.actions[kind] += 1  # Before the kill: the unblocked worker may look right away
+        psutil = _psutil()
+        killed = 0
+        if psutil is None:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                killed = 1
+            except OSError:
+                pass
+        else:
+            try:
+                root = psutil.Process(pid)
+                procs = root.children(recursive=True) + [root]
+            except psutil.Error:
+                procs = []
+            for proc in procs:
+                try:
+                    proc.kill()
+                    killed += 1
+                except psutil.Error:
+                    pass
+            psutil.wait_procs(procs, timeout=5)
+        if killed:
+            print(f"  🔪 Watchdog: {reason} → killed {killed} Chrome processes (pid {pid})")
+        TIMINGS.event(kind, pid=pid, reason=reason, processes=killed, **info)
+        return killed
+
+    def tree_mb(self, pid):
+        """
+        Memory of a driver's process tree. Summing RSS counts the pages Chrome's
+        processes share once per process, so each one contributes its PSS (Linux)
+        or USS instead; RSS only where neither can be read.
+        """
+        psutil = _psutil()
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0.0
+        total = 0
+        for proc in procs:
+            try:
+                full = proc.memory_full_info()
+                total += getattr(full, "pss", None) or full.uss
+            except (psutil.AccessDenied, AttributeError):
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            except psutil.Error:
+                pass
+        return total / 2 ** 20
+
+    def reap(self):
+        """Kill chromedriver/Chrome trees whose driver is gone (crashed starts, lost quits). -> processes killed"""
+        psutil = _psutil()
+        if psutil is None:
+            return 0
+        with self._lock:
+            tracked = set(self._drivers)
+        now, killed = time.time(), 0
+        for proc in psutil.process_iter(["pid", "ppid", "create_time"]):
+            info = proc.info
+            if info["pid"] in tracked or now - (info["create_time"] or now) < self.reap_grace:
+                continue
+            if not _is_chrome(proc):
+                continue
+            try:
+                parent, name = proc.parent(), proc.name()
+            except psutil.Error:
+                continue
+            # Roots only: re-parented to init, or leaked by this process. Anything under a live
+            # chromedriver, or started by another program, is left alone.
+            if parent is not None and parent.pid not in (1, os.getpid()):
+                continue
+            killed += self.kill(info["pid"], "orphans_reaped", "orphaned Chrome", name=name)
+        return killed
+
+    # ---- background thread ----
+    def _run(self):
+        last_reap = time.monotonic()
+        while True:
+            time.sleep(self.tick)
+            now = time.monotonic()
+            with self._lock:
+                late = [g for g in self._guards if g.deadline and now > g.deadline and not g.killed]
+                for g in late:
+                    g.killed = f"symbol deadline {self.deadline:.0f}s"
+                drivers = dict(self._drivers)
+            for g in late:
+                self.kill(g.pid, "deadline", f"{g.symbol or g.label} still running after {now - g.t0:.0f}s",
+                          symbol=g.symbol, driver=g.label)
+
+            psutil = _psutil()
+            if psutil is None:
+                if not self._warned:
+                    print("⚠️ Watchdog: psutil not installed, no RSS tracking or orphan reaping")
+                    self._warned = True
+                continue
+            for pid, label in drivers.items():
+                mb = self.tree_mb(pid)
+                self.peak_mb = max(self.peak_mb, mb)
+                TIMINGS.gauge("chrome_rss_mb", round(mb, 1))
+                if self.rss_mb and mb > self.rss_mb:
+                    with self._lock:
+                        first = pid in self._drivers and pid not in self._over
+                        if first:
+                            self._over[pid] = mb
+                            self.actions["rss"] += 1
+                    if first:
+                        print(f"  🐘 Watchdog: {label} at {mb:.0f} MB (> {self.rss_mb:.0f}), recycling it")
+                        TIMINGS.event("rss_recycle", pid=pid, driver=label, mb=round(mb, 1))
+            if self.reap_every and now - last_reap >= self.reap_every:
+                self.reap()
+                last_reap = now
+
+    def summary(self):
+        acts = ", ".join(f"{k} {v}" for k, v in sorted(self.actions.items())) or "no interventions"
+        return f"🐕 Watchdog: {acts} | peak Chrome RSS {self.peak_mb:.0f} MB per driver"
+
+
+# One per process: every pool's drivers are supervised by the same thread
+WATCHDOG = Watchdog()
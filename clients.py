@@ -0,0 +1,87 @@
+import os, json, glob, time, shutil, threading
+from functools import lru_cache
+
+# ---------------- CONFIG ---------------- #
+CREDENTIALS_FILE   = os.getenv("CREDENTIALS_FILE", "credentials.json")  # Used when GSPREAD_CREDENTIALS is unset
+CHROMEDRIVER       = os.getenv("CHROMEDRIVER", "")                       # Explicit binary: no resolution at all
+CHROMEDRIVER_CACHE = os.getenv("CHROMEDRIVER_CACHE", os.path.join(os.path.expanduser("~"), ".wdm", "mv2_chromedriver.json"))
+CHROMEDRIVER_TTL   = float(os.getenv("CHROMEDRIVER_TTL_HOURS", "24"))    # Re-ask webdriver-manager after this
+
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def sheets_client():
+    """One authorized gspread client per process, created on first use."""
+    import gspread
+    creds_json = os.getenv("GSPREAD_CREDENTIALS")
+    if creds_json:
+        return gspread.service_account_from_dict(json.loads(creds_json))
+    return gspread.service_account(filename=CREDENTIALS_FILE)
+
+
+def _read_cache(path=CHROMEDRIVER_CACHE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if os.path.exists(entry.get("path", "")) else None
+
+
+def _write_cache(driver_path, path=CHROMEDRIVER_CACHE):
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"path": driver_path, "resolved": time.time()}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ Chromedriver cache: {e}")
+
+
+def _on_disk():
+    """Any chromedriver already installed: PATH first, then the newest webdriver-manager download."""
+    found = shutil.which("chromedriver")
+    if found:
+        return found
+    downloads = glob.glob(os.path.join(os.path.expanduser("~"), ".wdm", "drivers", "chromedriver", "**", "chromedriver*"),
+                          recursive=True)
+    downloads = [p for p in downloads if os.path.isfile(p) and os.access(p, os.X_OK)]
+    return max(downloads, key=os.path.getmtime) if downloads else None
+
+
+def chromedriver_path():
+    """
+    chromedriver binary, resolved once per process: CHROMEDRIVER, then a
+    resolution younger than CHROMEDRIVER_TTL_HOURS, then webdriver-manager
+    (network). Offline, the last known or any installed binary is used.
+    None = let Selenium Manager find one.
+    """
+    with _lock:
+        return _resolve()
+
+
+@lru_cache(maxsize=None)
+def _resolve():
+    if CHROMEDRIVER:
+        return CHROMEDRIVER
+    cached = _read_cache()
+    if cached and time.time() - cached.get("resolved", 0) < CHROMEDRIVER_TTL * 3600:
+        return cached["path"]
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+        _write_cache(path)
+        return path
+    except Exception as e:
+        fallback = cached["path"] if cached else _on_disk()
+        print(f"⚠️ webdriver-manager failed ({e}), using {fallback or 'Selenium Manager'}")
+        return fallback
+
+
+def chrome_service():
+    """A Service for webdriver.Chrome around the cached chromedriver."""
+    from selenium.webdriver.chrome.service import Service
+    path = chromedriver_path()
+    return Service(path) if path else Service()
@@ -0,0 +1,230 @@
+import os, json, queue, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
+from timing import TIMINGS
+from clients import chrome_service
+from chrome_watchdog import WATCHDOG, DeadlineExceeded
+
+# ---------------- CONFIG ---------------- #
+TV_HOME      = "https://www.tradingview.com/"
+COOKIES_FILE = os.getenv("COOKIES_FILE", "cookies.json")
+POOL_MAX_PAGES = int(os.getenv("POOL_MAX_PAGES", "200"))  # Recycle Chrome after N symbols
+CONCURRENCY  = int(os.getenv("CONCURRENCY", "1"))         # Parallel Chrome workers per process
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+HIDE_WEBDRIVER_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+PAGE_LOAD_STRATEGY = os.getenv("PAGE_LOAD_STRATEGY", "eager")  # Return at DOMContentLoaded, not after every asset
+BLOCK_TYPES = os.getenv("BLOCK_TYPES", "image,font,media,tracking")  # Resource classes we never read; "" = none
+BLOCK_URLS  = os.getenv("BLOCK_URLS", "")                            # Extra comma-separated URL patterns
+
+# Network.setBlockedURLs matches URL patterns ("*" wildcards), so each resource
+# type maps to the patterns that identify it. Chart data (websocket, JSON) is never blocked.
+RESOURCE_PATTERNS = {
+    "image":    ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif"],
+    "font":     ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media":    ["*.mp4", "*.webm", "*.mp3", "*.m4a"],
+    "tracking": ["*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+                 "*googlesyndication.com*", "*facebook.net*", "*hotjar.com*", "*snowplow*",
+                 "*/telemetry/*", "*adservice*"],
+}
+
+
+def blocked_patterns(types=BLOCK_TYPES, extra=BLOCK_URLS):
+    """'image,font' + 'a,b' -> URL patterns for Network.setBlockedURLs."""
+    patterns = []
+    for kind in (t.strip() for t in types.split(",") if t.strip()):
+        patterns.extend(RESOURCE_PATTERNS.get(kind, []))
+    patterns.extend(p.strip() for p in extra.split(",") if p.strip())
+    return list(dict.fromkeys(patterns))
+
+
+def block_resources(driver, patterns):
+    """Drop matching requests inside Chrome before they hit the network (survives navigations)."""
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def build_options(*extra_args):
+    """Headless Chrome with the stealth flags every scraper uses."""
+    opts = Options()
+    opts.add_argument("--headless=new")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    for arg in extra_args:
+        opts.add_argument(arg)
+    opts.add_argument("--disable-blink-features=AutomationControlled")
+    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
+    opts.add_experimental_option("useAutomationExtension", False)
+    opts.add_argument(f"user-agent={USER_AGENT}")
+    opts.page_load_strategy = PAGE_LOAD_STRATEGY
+    return opts
+
+
+def load_cookies(driver, cookies_file=COOKIES_FILE, limit=None, home=TV_HOME):
+    """Log in by injecting cookies.json on the TradingView domain."""
+    if not os.path.exists(cookies_file):
+        return False
+    driver.get(home)
+    with open(cookies_file, "r") as f:
+        cookies = json.load(f)
+    for c in cookies[:limit]:
+        try:
+            driver.add_cookie({
+                "name": c.get("name"),
+                "value": c.get("value"),
+                "domain": c.get("domain", ".tradingview.com"),
+                "path": c.get("path", "/")
+            })
+        except:
+            pass
+    driver.refresh()
+    return True
+
+
+class _Slot:
+    def __init__(self, slot_id):
+        self.id = slot_id
+        self.driver = None
+        self.pages = 0
+
+
+class DriverPool:
+    """
+    Logged-in Chrome sessions reused across symbols.
+
+    Each slot starts Chrome and injects cookies once, then serves pages until it
+    has done `max_pages` symbols, the session dies, or the watchdog kills it
+    (symbol deadline) or flags it (RSS ceiling) - then it is replaced.
+
+        with pool.session() as driver:
+            driver.get(url)
+
+    `service` may be None: chromedriver is then resolved when the first
+    driver actually starts, so runs that never need Chrome never pay for it,
+    and every driver gets its own Service (own chromedriver process and port).
+    """
+
+    def __init__(self, service=None, size=1, max_pages=POOL_MAX_PAGES, extra_args=(),
+                 cookies_file=COOKIES_FILE, cookie_limit=None, page_load_timeout=None,
+                 blocked_urls=None, watchdog=WATCHDOG):
+        self.service = service
+        self.watchdog = watchdog
+        self.size = size
+        self.max_pages = max_pages
+        self.extra_args = tuple(extra_args)
+        self.cookies_file = cookies_file
+        self.cookie_limit = cookie_limit
+        self.page_load_timeout = page_load_timeout
+        self.blocked_urls = blocked_patterns() if blocked_urls is None else list(blocked_urls)
+        self.started = self.recycled = 0
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()  # LIFO keeps the warmest driver busy
+        for n in range(size):
+            self._idle.put(_Slot(n))
+
+    def _start(self, slot):
+        service = self.service or chrome_service()  # Own chromedriver per driver: its pid is what the watchdog kills
+        with TIMINGS.phase("chrome_start"):
+            driver = webdriver.Chrome(service=service, options=build_options(*self.extra_args))
+        self.watchdog.track(driver, f"driver {slot.id}")
+        try:
+            # The home page + refresh of the cookie login can wedge like any page: same deadline
+            with self.watchdog.watch(driver, f"driver {slot.id} start"):
+                # Survives navigations, unlike a one-off execute_script
+                driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": HIDE_WEBDRIVER_JS})
+                block_resources(driver, self.blocked_urls)
+                if self.page_load_timeout:
+                    driver.set_page_load_timeout(self.page_load_timeout)
+                with TIMINGS.phase("cookies"):
+                    load_cookies(driver, self.cookies_file, self.cookie_limit)
+        except Exception:
+            self.watchdog.quit(driver)
+            raise
+        with self._lock:
+            self.started += 1
+        print(f"  🚗 Driver {slot.id} ready (session #{self.started})")
+        return driver
+
+    def _retire(self, slot, reason):
+        if slot.driver is not None:
+            print(f"  ♻️ Recycling driver {slot.id} after {slot.pages} pages ({reason})")
+            self.watchdog.quit(slot.driver)
+            with self._lock:
+                self.recycled += 1
+        slot.driver, slot.pages = None, 0
+
+    @contextmanager
+    def session(self):
+        slot = self._idle.get()
+        guard = None
+        try:
+            if slot.driver is None:
+                slot.driver = self._start(slot)
+            with self.watchdog.watch(slot.driver, f"driver {slot.id}") as guard:
+                yield slot.driver
+        except DeadlineExceeded:
+            raise  # Already killed, replaced below
+        except TimeoutException:
+            raise  # Slow page, session is still usable
+        except Exception as e:
+            # WebDriverException, or urllib3 MaxRetryError/ProtocolError/ConnectionError once
+            # chromedriver is gone: never hand a possibly dead driver back to the pool
+            self._retire(slot, f"crash: {type(e).__name__}")
+            raise
+        finally:
+            if slot.driver is not None:
+                slot.pages += 1
+                mb = self.watchdog.over_limit(slot.driver)
+                if guard is not None and guard.killed:
+                    self._retire(slot, guard.killed)
+                elif mb:
+                    self._retire(slot, f"RSS {mb:.0f} MB")
+                elif slot.pages >= self.max_pages:
+                    self._retire(slot, "page limit")
+            self._idle.put(slot)
+
+    def recycle_all(self, reason="fresh start"):
+        """Quit every idle driver; the next session() starts a new Chrome."""
+        slots = [self._idle.get() for _ in range(self.size)]
+        for slot in slots:
+            self._retire(slot, reason)
+            self._idle.put(slot)
+
+    def close(self):
+        for _ in range(self.size):
+            slot = self._idle.get()
+            if slot.driver is not None:
+                self.watchdog.quit(slot.driver)
+                slot.driver = None
+        for n in range(self.size):
+            self._idle.put(_Slot(n))
+        self.watchdog.reap()  # Whatever a crashed start or a killed tree left behind
+        print(f"🧹 Driver pool closed ({self.started} started, {self.recycled} recycled)")
+
+
+def scrape_in_order(fn, jobs, concurrency=CONCURRENCY):
+    """
+    Run fn(job) on `concurrency` threads and yield (job, result) in job order,
+    so callers can keep writing rows top-to-bottom. At most 2x concurrency jobs
+    are in flight, which keeps checkpoints close to the real progress.
+    """
+    if concurrency <= 1:
+        for job in jobs:
+            yield job, fn(job)
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scrape") as ex:
+        pending = deque()
+        for job in jobs:
+            pending.append((job, ex.submit(fn, job)))
+            if len(pending) >= concurrency * 2:
+                done_job, fut = pending.popleft()
+                yield done_job, fut.result()
+        while pending:
+            done_job, fut = pending.popleft()
+            yield done_job, fut.result()
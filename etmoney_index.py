@@ -0,0 +1,135 @@
+import os, re, sys, json, time, difflib, argparse
+import requests
+from clients import sheets_client
+from symbol_list import load_symbol_list
+
+# ---------------- CONFIG ---------------- #
+ETMONEY_BASE_URL    = os.getenv("ETMONEY_BASE_URL", "https://www.etmoney.com")
+ETMONEY_SITEMAP_URL = os.getenv("ETMONEY_SITEMAP_URL", ETMONEY_BASE_URL + "/sitemap.xml")
+ETMONEY_INDEX_FILE  = os.getenv("ETMONEY_INDEX_FILE", "etmoney_index.json")
+FUZZY_CUTOFF        = float(os.getenv("ETMONEY_FUZZY_CUTOFF", "0.88"))
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'}
+LOC_RE   = re.compile(r"<loc>\s*([^<]+?)\s*</loc>", re.I)
+SLUG_RE  = re.compile(r"/stocks/([a-z0-9][a-z0-9\-]*/\d+)/?$", re.I)
+NOISE    = {"ltd", "limited", "the", "co", "company", "corp", "corporation", "inc", "india", "of", "and"}
+
+
+def normalize(name):
+    """'360 ONE WAM Ltd.' / '360-one-wam-ltd' -> '360 one wam'"""
+    words = re.sub(r"[^a-z0-9]+", " ", (name or "").lower().replace("&", " and ")).split()
+    return " ".join(w for w in words if w not in NOISE)
+
+
+def crawl_sitemap(url=ETMONEY_SITEMAP_URL, session=None, max_sitemaps=60):
+    """Every /stocks/<slug>/<id> URL reachable from the sitemap (index)."""
+    session = session or requests.Session()
+    todo, seen, slugs = [url], set(), set()
+    while todo and len(seen) < max_sitemaps:
+        current = todo.pop(0)
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            resp = session.get(current, headers=HEADERS, timeout=30)
+            resp.raise_for_status()
+        except Exception as e:
+            print(f"  ⚠️ Sitemap {current}: {e}")
+            continue
+        locs = LOC_RE.findall(resp.text)
+        if "<sitemapindex" in resp.text[:2000].lower():
+            children = [l for l in locs if "stock" in l.lower()] or locs
+            todo.extend(children)
+            continue
+        for loc in locs:
+            m = SLUG_RE.search(loc)
+            if m:
+                slugs.add(m.group(1).lower())
+    print(f"🗺️ {len(slugs)} stock pages from {len(seen)} sitemap(s)")
+    return slugs
+
+
+def match_symbols(companies, slugs, cutoff=FUZZY_CUTOFF):
+    """
+    companies: [(symbol, company_name)] from Sheet1 (A, B).
+    Exact normalized name or symbol match first, then difflib within the
+    same first word, so 2,500 x N slugs stays fast. -> {symbol: slug}
+    """
+    by_name, by_first = {}, {}
+    for slug in sorted(slugs):
+        key = normalize(slug.split("/")[0])
+        if not key:
+            continue
+        by_name.setdefault(key, slug)
+        by_first.setdefault(key.split()[0], []).append(key)
+
+    index, fuzzy = {}, 0
+    for symbol, company in companies:
+        symbol = symbol.strip().upper()
+        for key in (normalize(company), normalize(symbol)):
+            if key in by_name:
+                index[symbol] = by_name[key]
+                break
+        else:
+            key = normalize(company)
+            if not key:
+                continue
+            close = difflib.get_close_matches(key, by_first.get(key.split()[0], []), n=1, cutoff=cutoff)
+            if close:
+                index[symbol] = by_name[close[0]]
+                fuzzy += 1
+    print(f"🔗 Matched {len(index)}/{len(companies)} symbols ({fuzzy} fuzzy)")
+    return index
+
+
+def save_index(index, path=ETMONEY_INDEX_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"built": time.time(), "slugs": index}, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp, path)
+
+
+def load_index(path=ETMONEY_INDEX_FILE):
+    """{symbol: slug}, or None when no index has been built."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("slugs", {})
+
+
+def index_age_days(path=ETMONEY_INDEX_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return (time.time() - json.load(f).get("built", 0)) / 86400
+
+
+def read_companies():
+    """(symbol, company name) pairs from Sheet1 columns A and B."""
+    rows = load_symbol_list(sheets_client())["rows"][1:]
+    return [(r[0], r[1] if len(r) > 1 else "") for r in rows if r and r[0].strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the symbol -> ETMoney slug index")
+    parser.add_argument("--max-age-days", type=float, default=None,
+                        help="Skip the rebuild when the existing index is younger than this")
+    args = parser.parse_args(argv)
+
+    age = index_age_days()
+    if args.max_age_days is not None and age is not None and age < args.max_age_days:
+        print(f"✅ {ETMONEY_INDEX_FILE} is {age:.1f} days old, keeping it")
+        return 0
+
+    slugs = crawl_sitemap()
+    if not slugs:
+        print("❌ No stock pages found, index left untouched")
+        return 1
+    index = match_symbols(read_companies(), slugs)
+    save_index(index)
+    print(f"💾 {ETMONEY_INDEX_FILE}: {len(index)} symbols")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,30 @@
-import os, time, json, gspread, random, csv
+import os, sys, csv, argparse
+from functools import lru_cache
 from datetime import date
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
 from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
 import re
-import requests
+from readiness import wait_for_text, STATS as WAIT_STATS
+from sheet_writer import SheetWriter
+from sheet_diff import RowDiff
+from sector_cache import SectorCache, NO_DATA
+from nse_client import NSEClient
+from etmoney_index import load_index, ETMONEY_BASE_URL
+from clients import sheets_client, chrome_service
+from timing import TIMINGS
+from ratelimit import AdaptiveRate
+from retry_queue import RetryQueue, failed_rows, RETRY_FAILURES
+from symbol_list import load_symbol_list
 
-STOCK_LIST_URL = "https://docs.google.com/spreadsheets/d/1V8DsH-R3vdUbXqDKZYWHk_8T0VRjqTEVyj7PhlIDtG4/edit?gid=0#gid=0"
 NEW_MV2_URL    = "https://docs.google.com/spreadsheets/d/1GKlzomaK4l_Yh8pzVtzucCogWW5d-ikVeqCxC6gvBuc/edit?gid=0#gid=0"
 
 CHUNK_START = int(os.getenv('CHUNK_START', 0))
 CHUNK_END = int(os.getenv('CHUNK_END', 2500))
 BATCH_SIZE = 20
+ETM_READY_TIMEOUT = float(os.getenv("ETM_READY_TIMEOUT", "5"))  # Give up on pages without a sector
+SECTOR_TEXT = r'(Sector|Industry)[:\s]*[A-Z][A-Za-z\s\-&/]{2,50}'
+ETM_BATCH_RATE = float(os.getenv("ETM_BATCH_RATE", "0.33"))  # Starting batches/second (was a 2-4s sleep)
 
 SYMBOL_ETMONEY_MAP = {
     '360ONE': '360-one-wam-ltd/1035', '3IINFOLTD': '3i-infotech-ltd/1003', 
@@ -22,6 +32,14 @@ SYMBOL_ETMONEY_MAP = {
     '63MOONS': '63-moons-technologies-ltd/1006', 'A2ZINFRA': 'a2z-infra-engineering-ltd/1007',
 }
 
+@lru_cache(maxsize=None)
+def slug_index():
+    """Built by etmoney_index.py from the ETMoney sitemap; manual entries above win. Read on first lookup."""
+    index = load_index()
+    if index is not None:
+        index.update(SYMBOL_ETMONEY_MAP)
+    return index
+
 def get_driver():
     opts = Options()
     opts.add_argument("--headless=new"); opts.add_argument("--no-sandbox")
@@ -30,34 +48,32 @@ def get_driver():
     opts.add_experimental_option("excludeSwitches", ["enable-automation"])
     opts.add_experimental_option('useAutomationExtension', False)
     opts.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
+    return webdriver.Chrome(service=chrome_service(), options=opts)  # chromedriver resolved once per process
+
+NSE = NSEClient()  # Pooled session, cookies primed on first use
 
 def get_nse_sector_api(symbol):
-    try:
-        url = f"https://www.nseindia.com/api/quote-equity?symbol={symbol}"
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36', 'Accept': 'application/json', 'Referer': 'https://www.nseindia.com/'}
-        resp = requests.get(url, headers=headers, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            return data.get('info', {}).get('industry') or data.get('info', {}).get('sector')
-    except: pass
-    return None
+    return NSE.sector(symbol)
+
+def resolve_slug(symbol):
+    """O(1) index lookup. Without an index, fall back to the old '-ltd' guess."""
+    index = slug_index()
+    if index is None:
+        return SYMBOL_ETMONEY_MAP.get(symbol) or f"{symbol.lower()}-ltd"
+    return index.get(symbol)
 
 def scrape_sector_direct(driver, symbol):
     try:
-        slug = SYMBOL_ETMONEY_MAP.get(symbol)
-        if slug:
-            driver.get(f"https://www.etmoney.com/stocks/{slug}")
-            WebDriverWait(driver, 10).until(lambda d: d.execute_script("return document.readyState") == "complete")
-            time.sleep(2); soup = BeautifulSoup(driver.page_source, "html.parser")
-            sector = extract_sector(soup)
-            if sector and sector != "NO_DATA": return sector
-        
-        driver.get(f"https://www.etmoney.com/stocks/{symbol.lower()}-ltd")
-        WebDriverWait(driver, 10).until(lambda d: d.execute_script("return document.readyState") == "complete")
-        time.sleep(2)
-        return extract_sector(BeautifulSoup(driver.page_source, "html.parser"))
-    except: return None
+        slug = resolve_slug(symbol)
+        if not slug: return None  # Not on ETMoney: no speculative page loads
+        with TIMINGS.phase("page_load"):
+            driver.get(f"{ETMONEY_BASE_URL}/stocks/{slug}")
+        wait_for_text(driver, SECTOR_TEXT, timeout=ETM_READY_TIMEOUT, label="etmoney sector")
+        with TIMINGS.phase("parse"):
+            return extract_sector(BeautifulSoup(driver.page_source, "html.parser"))
+    except Exception as e:
+        TIMINGS.fail(e)
+        return None
 
 def extract_sector(soup):
     text = soup.get_text()
@@ -67,86 +83,146 @@ def extract_sector(soup):
         if match: return match.group(1).strip()
     return None
 
-def get_sector(symbol, driver):
-    sector = get_nse_sector_api(symbol)
-    if sector: return sector
-    sector = scrape_sector_direct(driver, symbol)
-    return sector or "NO_DATA"
+def get_sectors(symbols, driver, cache=None, nse=NSE, refresh=False):
+    """Whole batch: cache first, ONE concurrent NSE round for the misses, ETMoney pages for the rest.
+    refresh=True skips the cache reads (retries) but still stores the new results.
+    -> ({symbol: sector}, [symbols looked up on the network this call])"""
+    sectors = {}
+    for symbol in symbols:
+        cached = cache.get(symbol) if cache and not refresh else None
+        if cached:
+            sectors[symbol] = cached
+            with TIMINGS.symbol(symbol, source="CACHE"): pass
+    misses = [s for s in dict.fromkeys(symbols) if s not in sectors]
+    with TIMINGS.phase("nse_batch"):
+        api = nse.fetch_sectors(misses)
+    for symbol in misses:
+        with TIMINGS.symbol(symbol) as rec:
+            rec.carry("nse", getattr(nse, "durations", {}).pop(symbol, 0.0))  # Looked up concurrently above
+            sector, source = api.get(symbol), "NSE"
+            if not sector: sector, source = scrape_sector_direct(driver, symbol), "ETMONEY"
+            if not sector:
+                sector, source = NO_DATA, "NONE"
+                rec.fail("no data")
+            rec.extra["source"] = source
+        if cache: cache.put(symbol, sector, source)
+        sectors[symbol] = sector
+    return sectors, misses
 
-def write_to_sheet6_ordered(client, results, chunk_start, local_index):
-    """🎯 WRITE TO EXACT ROW POSITIONS - Perfect Order!"""
-    try:
-        sheet = client.open_by_url(NEW_MV2_URL).worksheet("Sheet6")
-        
-        # Calculate EXACT sheet rows (CHUNK_START + local position + 2 for header)
-        start_row = chunk_start + local_index + 2  # Row 2 = first data row
-        end_row = start_row + len(results) - 1
-        
-        # UPDATE specific range A:start_row:C:end_row
-        range_name = f"A{start_row}:C{end_row}"
-        sheet.update(range_name, results)
-        
-        print(f"✅ Rows {start_row}-{end_row} WRITTEN ({len(results)} rows)")
-        return True
-    except Exception as e:
-        print(f"❌ Write failed: {e}")
-        return False
+def get_sector(symbol, driver, cache=None):
+    return get_sectors([symbol], driver, cache)[0][symbol]
+
+def write_to_sheet6_ordered(writer, rows):
+    """🎯 WRITE TO EXACT ROW POSITIONS - Perfect Order! (queued, written in the background)"""
+    # rows = [(sheet_row, result)], sheet_row = CHUNK_START + local position + 2 for header
+    for row_no, result in rows:
+        writer.put(row_no, result)
+    if rows:
+        print(f"📤 Rows {rows[0][0]}-{rows[-1][0]} queued ({len(rows)} rows)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sectors for a Sheet1 chunk -> Sheet6 (NSE first, ETMoney pages for the rest)")
+    parser.add_argument("--chunk-start", type=int, default=CHUNK_START)
+    parser.add_argument("--chunk-end", type=int, default=CHUNK_END)
+    args = parser.parse_args(argv)
+    chunk_start, chunk_end = args.chunk_start, args.chunk_end
 
-def main():
-    driver = client = None
-    print(f"🚀 ET Money Scraper - Chunk {CHUNK_START}-{CHUNK_END} (ORDERED)")
+    driver = client = writer = None
+    cache = SectorCache()  # Only new, expired or NO_DATA-expired symbols hit the network
+    TIMINGS.start_run("etmoney")
+    print(f"🚀 ET Money Scraper - Chunk {chunk_start}-{chunk_end} (ORDERED)")
     
     try:
         # Auth
-        creds_json = os.getenv("GSPREAD_CREDENTIALS")
-        client = gspread.service_account_from_dict(json.loads(creds_json)) if creds_json else gspread.service_account(filename="credentials.json")
+        client = sheets_client()
         
-        # Read FULL symbol list
-        source_sheet = client.open_by_url(STOCK_LIST_URL).worksheet("Sheet1")
-        all_data = source_sheet.get_all_values()
+        # Sheet6 opened ONCE, writes go through the background writer.
+        # Sectors barely move week to week: the chunk's block is read once and only changed cells are sent.
+        sheet6 = client.open_by_url(NEW_MV2_URL).worksheet("Sheet6")
+        writer = SheetWriter(sheet6, diff=RowDiff.fetch(sheet6, chunk_start + 2, chunk_end + 1, 3, date_col=2))
+        
+        # Read FULL symbol list (local snapshot while Sheet1 is unchanged)
+        all_data = load_symbol_list(client)["rows"]
         all_symbols = [row[0].strip().upper() for row in all_data[1:] if row and row[0].strip()]
         
-        # OUR chunk (0-indexed)
-        symbols = all_symbols[CHUNK_START:CHUNK_END]
+        # OUR chunk (0-indexed) -> [(sheet row, symbol)]
+        symbols = all_symbols[chunk_start:chunk_end]
+        targets = [(chunk_start + k + 2, symbol) for k, symbol in enumerate(symbols)]
         print(f"📖 {len(symbols)} symbols: {symbols[0]} → {symbols[-1]}")
+        if RETRY_FAILURES:  # Only the chunk's rows Sheet6 shows as NO_DATA/Error, cache bypassed
+            failed = failed_rows(sheet6.get_all_values()[1:], first_col=1, last_col=2)
+            targets = [(chunk_start + k + 2, symbol) for k, symbol in enumerate(symbols) if chunk_start + k in failed]
+            print(f"🔁 Retry-failures mode: {len(targets)} failed rows in Sheet6")
         
         # CSV backup
-        chunk_file = f"chunk_{CHUNK_START}_{CHUNK_END}_sectors_{date.today().strftime('%d%m%Y')}.csv"
+        chunk_file = f"chunk_{chunk_start}_{chunk_end}_sectors_{date.today().strftime('%d%m%Y')}.csv"
         with open(chunk_file, 'w', newline='') as f: 
             csv.writer(f).writerow(['SYMBOL', 'SECTOR', 'DATE'])
         
         driver = get_driver()
-        results = []
-        local_index = 0  # Tracks position WITHIN chunk
+        retry = RetryQueue(label="etmoney")  # NO_DATA symbols, looked up again at the end of the chunk
+        # Batches speed up while NSE answers cleanly, halve on 429/403/timeouts or an all-empty batch
+        pacer = AdaptiveRate("etmoney", ETM_BATCH_RATE, min_rate=1 / 30, max_rate=2.0, on_change=TIMINGS.gauge)
         
-        for i, symbol in enumerate(symbols, 1):
-            print(f"[{i:3d}/{len(symbols)}] {symbol}")
-            sector = get_sector(symbol, driver)
-            results.append([symbol, sector, date.today().strftime("%d/%m/%Y")])
+        # One batch at a time: NSE lookups for the batch run concurrently
+        for local_index in range(0, len(targets), BATCH_SIZE):
+            batch_rows = targets[local_index:local_index + BATCH_SIZE]
+            batch = [symbol for _, symbol in batch_rows]
+            pacer.wait()
+            throttled = NSE.throttled
+            sectors, looked_up = get_sectors(batch, driver, cache, refresh=RETRY_FAILURES)  # Cached NO_DATA is not retried
+            if NSE.throttled > throttled:
+                pacer.failure("throttled")
+            elif all(sectors[s] == NO_DATA for s in batch):
+                pacer.failure("empty")
+            else:
+                pacer.success()
+            rows = []
+            for i, (row_no, symbol) in enumerate(batch_rows, local_index + 1):
+                print(f"[{i:3d}/{len(targets)}] {symbol} → {sectors[symbol]}")
+                if sectors[symbol] == NO_DATA and symbol in looked_up:
+                    retry.add(row_no, (row_no, symbol), NO_DATA)
+                    continue
+                rows.append((row_no, [symbol, sectors[symbol], date.today().strftime("%d/%m/%Y")]))
             
             # Batch write to EXACT positions
-            if len(results) >= BATCH_SIZE:
-                write_to_sheet6_ordered(client, results, CHUNK_START, local_index)
-                
-                # CSV backup
-                with open(chunk_file, 'a', newline='') as f: 
-                    csv.writer(f).writerows(results)
-                
-                local_index += len(results)
-                results = []
-                time.sleep(random.uniform(2, 4))
-        
-        # Final batch
-        if results:
-            write_to_sheet6_ordered(client, results, CHUNK_START, local_index)
+            write_to_sheet6_ordered(writer, rows)
+            
+            # CSV backup
             with open(chunk_file, 'a', newline='') as f: 
-                csv.writer(f).writerows(results)
+                csv.writer(f).writerows(result for _, result in rows)
+            
+            cache.save()
+        
+        def fresh():
+            nonlocal driver
+            if driver: driver.quit()
+            driver = get_driver()
+            NSE.prime(force=True)
+        
+        def lookup(job):
+            return get_sectors([job[1]], driver, cache, refresh=True)[0][job[1]]
+        
+        rows = [(row_no, [symbol, sector, date.today().strftime("%d/%m/%Y")])
+                for (row_no, symbol), sector in retry.drain(lookup, failed=lambda s: s == NO_DATA, fresh=fresh)]
+        rows.sort()
+        write_to_sheet6_ordered(writer, rows)
+        with open(chunk_file, 'a', newline='') as f: 
+            csv.writer(f).writerows(result for _, result in rows)
         
-        print(f"🎉 PERFECT ORDER: {len(symbols)} symbols → Sheet6 Rows {CHUNK_START+2}-{CHUNK_END+1}")
+        print(f"🌐 NSE: {NSE.calls} API calls, {NSE.primes} cookie primes")
+        print(cache.summary())
+        print(WAIT_STATS.summary())
+        print(pacer.summary())
+        print(retry.summary())
+        print(f"🎉 PERFECT ORDER: {len(symbols)} symbols → Sheet6 Rows {chunk_start+2}-{chunk_end+1}")
         
     except Exception as e: 
         print(f"💥 ERROR: {e}")
     finally: 
+        cache.save()
+        if writer: writer.close()
         if driver: driver.quit()
+        TIMINGS.write_summary()
 
-if __name__ == "__main__": main()
+if __name__ == "__main__": sys.exit(main())
@@ -0,0 +1,233 @@
+import os, re, threading
+from timing import TIMINGS
+
+# ---------------- CONFIG ---------------- #
+DRIFT_AFTER = int(os.getenv("EXTRACT_DRIFT_AFTER", "3"))  # Failed symbols in a row before "nothing matches" alerts
+
+# ---------------- SELECTORS (same order as before) ---------------- #
+PANEL_SELECTOR = "div.valueValue-l31H9iuA.apply-common-tooltip"
+SELECTORS = [
+    ".valueValue-l31H9iuA.apply-common-tooltip",
+    ".valueValue-l31H9iuA",
+    "div[class*='valueValue']",
+    "div[class*='value']",
+    ".chart-markup-table .value",
+    "[data-value]"
+]
+
+# Text of the value panel, one round trip
+EXTRAS = ("numeric", "cells")  # Non-selector strategies, in ranking order
+STRATEGIES = [f"css:{sel}" for sel in SELECTORS] + list(EXTRAS)
+PANEL_STRATEGIES = [f"css:{sel}" for sel in SELECTORS[:3]]  # Value-panel cells only: loose matches aren't the panel
+
+PANEL_JS = "return Array.from(document.querySelectorAll(arguments[0]), el => el.textContent);"
+
+# Every candidate the 14-value scraper looks at, in ONE round trip:
+#   selectors: innerText of the first 20 matches per selector (what el.text returned)
+#   numeric:   the first 15 <div>s whose sole string contains [\d,.-] (BeautifulSoup's string=)
+#   cells:     textContent of the first 20 td/th in each of the first 3 tables
+# arguments[1] limits numeric/cells, so a learned fast path skips the DOM walks it doesn't need.
+EXTRACT_JS = r"""
+const selectors = arguments[0];
+const extras = arguments[1] || ["numeric", "cells"];
+const out = {selectors: {}, numeric: [], cells: []};
+
+for (const sel of selectors) {
+  try {
+    out.selectors[sel] = Array.from(document.querySelectorAll(sel)).slice(0, 20).map(el => el.innerText || "");
+  } catch (e) {
+    out.selectors[sel] = [];
+  }
+}
+
+function soleString(el) {
+  while (el.childNodes.length === 1) {
+    const c = el.childNodes[0];
+    if (c.nodeType === Node.TEXT_NODE) return c.nodeValue;
+    if (c.nodeType !== Node.ELEMENT_NODE) return null;
+    el = c;
+  }
+  return null;
+}
+for (const div of extras.includes("numeric") ? document.getElementsByTagName("div") : []) {
+  const s = soleString(div);
+  if (s !== null && /[\d,.-]/.test(s)) {
+    out.numeric.push(div.textContent);
+    if (out.numeric.length >= 15) break;
+  }
+}
+
+for (const table of extras.includes("cells") ? Array.from(document.getElementsByTagName("table")).slice(0, 3) : []) {
+  for (const cell of Array.from(table.querySelectorAll("td, th")).slice(0, 20)) {
+    out.cells.push(cell.textContent);
+  }
+}
+return out;
+"""
+
+
+def panel_values(driver, selector=PANEL_SELECTOR):
+    """Cleaned text of the chart's value panel."""
+    return [
+        t.replace('−', '-').replace('∅', '').strip()
+        for t in driver.execute_script(PANEL_JS, selector) or []
+    ]
+
+
+def extract_page(driver, selectors=SELECTORS, extras=EXTRAS):
+    return driver.execute_script(EXTRACT_JS, list(selectors), list(extras)) or {}
+
+
+def pick_values(payload, count=14, verbose=True):
+    """
+    Same ranking as the old find_elements + BeautifulSoup strategies, applied to
+    the EXTRACT_JS payload. -> (values padded to `count` with "N/A", unique found)
+    """
+    all_values = []
+
+    # Strategy 1: Primary value classes
+    for selector, texts in (payload.get("selectors") or {}).items():
+        values = []
+        for text in texts:
+            text = text.strip().replace('−', '-').replace('∅', '')
+            if text and len(text) < 25:  # Valid value
+                values.append(text)
+        if texts:
+            all_values.extend(values)
+            if verbose:
+                print(f"  ✅ Selector '{selector}': {len(values)} values")
+
+    # Strategy 2: Numeric text extraction
+    for text in payload.get("numeric") or []:
+        text = text.strip().replace('−', '-')
+        if re.match(r'^[\d,.-]+.*|.*[\d,.-]+$', text) and len(text) < 25:
+            if text not in all_values:
+                all_values.append(text)
+
+    # Strategy 3: Table cells
+    for text in payload.get("cells") or []:
+        text = text.strip().replace('−', '-')
+        if re.match(r'[\d,.-]', text) and len(text) < 25 and text not in all_values:
+            all_values.append(text)
+
+    # Deduplicate + Clean
+    unique_values = []
+    for val in all_values:
+        if val and len(val) < 30 and val not in unique_values:
+            unique_values.append(val)
+
+    # Pad to exactly `count` columns
+    final_values = unique_values[:count]
+    while len(final_values) < count:
+        final_values.append("N/A")
+    return final_values, len(unique_values)
+
+
+def strategy_values(payload, strategy, keep_empty=False):
+    """Cleaned candidate texts one strategy produced, in page order.
+    keep_empty=True keeps "" for empty cells ("∅"), so every value keeps its column."""
+    if strategy.startswith("css:"):
+        texts = (payload.get("selectors") or {}).get(strategy[4:]) or []
+    else:
+        texts = payload.get(strategy) or []
+    cleaned = (t.strip().replace('−', '-').replace('∅', '') for t in texts)
+    return [t for t in cleaned if (t or keep_empty) and len(t) < 25]
+
+
+def numeric_count(values):
+    return sum(1 for v in values if v and v != "N/A" and re.search(r"\d", v))
+
+
+class AdaptiveExtractor:
+    """
+    Learns which strategies produce the values and reuses only those on later
+    pages (fewer selectors, no DOM walks). Every result is checked for
+    `min_valid` numeric values out of `count`; a failed check re-runs the
+    full search, and a changed or missing winner is layout drift - printed
+    loudly and recorded in the run summary, not written as silent "Error" rows.
+    One empty, CAPTCHA'd or delisted page is not drift: "nothing matches"
+    alerts only after `drift_after` different symbols failed in a row, and
+    the learned winner is kept until then.
+
+    mode="panel": the first value-panel selector that validates wins; its first `count`
+                  cells are returned in place, empty ones as "".
+    mode="merge": pick_values() ranking over all strategies; the winner is the set that filled the row.
+    """
+
+    def __init__(self, name, count, mode="merge", min_valid=None, strategies=None, drift_after=DRIFT_AFTER):
+        self.name, self.count, self.mode, self.drift_after = name, count, mode, max(1, drift_after)
+        self.min_valid = count if min_valid is None else min_valid
+        self.strategies = list(strategies or (PANEL_STRATEGIES if mode == "panel" else STRATEGIES))
+        self.winner = None   # Ordered strategies of the fast path
+        self.broken = False  # In a drift episode: alert once, then once more on recovery
+        self.fast = self.searches = self.drifts = 0
+        self._failing = set()  # Symbols that failed since the last valid page
+        self._lock = threading.Lock()
+
+    def probe(self, default="div[class*='valueValue']"):
+        """CSS selector to wait on: the learned one while it holds, a loose class match otherwise."""
+        css = [s[4:] for s in self.winner or [] if s.startswith("css:")]
+        return css[0] if css else default
+
+    def valid(self, values):
+        if self.mode == "panel":  # All `count` cells present; the filled ones (not "∅") numeric
+            cells = [v for v in values[:self.count] if v]
+            return len(values) >= self.count and bool(cells) and numeric_count(cells) == len(cells)
+        return numeric_count(values[:self.count]) >= self.min_valid
+
+    def _run(self, driver, strategies):
+        payload = extract_page(driver, [s[4:] for s in strategies if s.startswith("css:")],
+                               [s for s in strategies if not s.startswith("css:")])
+        if self.mode == "panel":
+            for strategy in strategies:
+                values = strategy_values(payload, strategy, keep_empty=True)
+                if self.valid(values):
+                    return values[:self.count], [strategy]
+            fallback = strategy_values(payload, strategies[0], keep_empty=True) if strategies else []
+            return fallback[:self.count], []  # The panel as the old code read it
+        values, _ = pick_values(payload, self.count, verbose=False)
+        used = [s for s in strategies if set(strategy_values(payload, s)) & set(values)]
+        return values, used
+
+    def extract(self, driver):
+        """-> values (panel: the winning strategy's texts, merge: padded to `count` with "N/A")."""
+        winner = self.winner
+        if winner:
+            values, _ = self._run(driver, winner)
+            if self.valid(values):
+                with self._lock:
+                    self.fast += 1
+                return values
+
+        values, used = self._run(driver, self.strategies)
+        rec = TIMINGS.current()
+        with self._lock:
+            self.searches += 1
+            if self.valid(values):
+                if winner and used != winner:
+                    self._drift(f"{self._label(winner)} stopped matching, now {self._label(used)}", old=winner, new=used)
+                elif self.broken:
+                    print(f"  ✅ {self.name}: layout readable again via {self._label(used)}")
+                self.winner, self.broken = used, False
+                self._failing.clear()
+            elif not self.broken:
+                # Retries of the same symbol count once
+                self._failing.add(rec.symbol if rec is not None else self.searches)
+                if len(self._failing) >= self.drift_after:
+                    self._drift(f"no strategy yields {self.min_valid} numeric values of {self.count} "
+                                f"on {len(self._failing)} symbols in a row", old=self.winner, new=None)
+                    self.winner, self.broken = None, True
+        return values
+
+    def _drift(self, message, old, new):
+        self.drifts += 1
+        print(f"🚨🚨 LAYOUT DRIFT ({self.name}): {message} - check the selectors in extractor.py")
+        TIMINGS.event("layout_drift", extractor=self.name, message=message, old=old, new=new)
+
+    @staticmethod
+    def _label(strategies):
+        return " + ".join(strategies) if strategies else "nothing"
+
+    def summary(self):
+        return (f"🧭 {self.name} extractor: {self.fast} fast path, {self.searches} full searches, "
+                f"{self.drifts} drift alerts (using {self._label(self.winner)})")
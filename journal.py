@@ -0,0 +1,109 @@
+import os, json, time, threading
+
+
+class Journal:
+    """
+    Append-only JSONL log of scraped rows, fsynced per line.
+
+        {"header": {"hash": "...", "date": "2026-10-17"}}   first line: the run it belongs to
+        {"i": 17, "row": 19, "values": [...]}   scraped, not yet in the sheet
+        {"i": 17, "flushed": true}              written to the sheet
+
+    On restart, pending() lists rows to replay to the sheet without scraping
+    again, and scraped() lists rows that must not be scraped again. Row
+    indexes only mean something for one symbol snapshot on one day: a journal
+    with another header is moved to <path>.stale and the run starts fresh.
+    finish() moves a fully flushed journal to <path>.done.
+    """
+
+    def __init__(self, path, version=None, day=None):
+        self.path = path
+        self.header = {"hash": version, "date": day or time.strftime("%Y-%m-%d", time.gmtime())}
+        self._lock = threading.Lock()
+        self._rows = {}        # i -> (row_no, values)
+        self._flushed = set()
+        if os.path.exists(path) and not self._load():
+            os.replace(path, path + ".stale")
+            self._rows, self._flushed = {}, set()
+        self._f = open(path, "a", encoding="utf-8")
+        if not self._f.tell():
+            self._append({"header": self.header})
+        elif not _ends_with_newline(path):
+            self._f.write("\n")  # Don't glue the next record onto a torn line
+
+    def _load(self):
+        """-> False when the file belongs to another snapshot or day."""
+        bad = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f):
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    bad += 1  # Torn last line from a crash
+                    continue
+                if n == 0 and rec.get("header") != self.header:
+                    found = rec.get("header") or "no header"
+                    print(f"📒 Journal {self.path} is from another run ({found}), moved to {self.path}.stale")
+                    return False
+                if "header" in rec:
+                    continue
+                if rec.get("flushed"):
+                    self._flushed.add(rec["i"])
+                else:
+                    self._rows[rec["i"]] = (rec["row"], rec["values"])
+                    self._flushed.discard(rec["i"])
+        print(f"📒 Journal {self.path}: {len(self._rows)} scraped, "
+              f"{len(self._rows) - len(self._flushed & set(self._rows))} unflushed"
+              + (f", {bad} torn lines skipped" if bad else ""))
+        return True
+
+    def _append(self, rec):
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    def record(self, i, row_no, values):
+        """Call as soon as a row is scraped, before it is queued for the sheet."""
+        self._append({"i": i, "row": row_no, "values": values})
+        with self._lock:
+            self._rows[i] = (row_no, values)
+            self._flushed.discard(i)
+
+    def flushed(self, i):
+        """Call after the row's sheet write succeeded."""
+        self._append({"i": i, "flushed": True})
+        with self._lock:
+            self._flushed.add(i)
+
+    def scraped(self):
+        with self._lock:
+            return set(self._rows)
+
+    def pending(self):
+        """[(i, row_no, values)] scraped but never confirmed in the sheet."""
+        with self._lock:
+            return [(i, r, v) for i, (r, v) in sorted(self._rows.items()) if i not in self._flushed]
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+    def finish(self):
+        """Clean end of a run: close, and rotate the journal away once every row reached the sheet."""
+        self.close()
+        left = len(self.pending())
+        if left:
+            print(f"📒 Journal {self.path}: {left} rows never confirmed in the sheet, kept for the next run")
+            return False
+        os.replace(self.path, self.path + ".done")
+        return True
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
@@ -0,0 +1,235 @@
+import os, re, json, time, threading
+from timing import TIMINGS
+
+# ---------------- CONFIG ---------------- #
+LLM_MODEL      = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "25"))      # Symbols per prompt
+LLM_RPM        = float(os.getenv("LLM_RPM", "30"))           # Starting budgets; headers correct them
+LLM_TPM        = float(os.getenv("LLM_TPM", "6000"))
+LLM_MAX_TRIES  = int(os.getenv("LLM_MAX_TRIES", "4"))
+OUT_TOKENS_PER_ITEM = 40
+
+
+def parse_reset(value):
+    """Groq reset header ('7.66s', '2m59.56s', '120ms', '1h2m') -> seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, found = 0.0, False
+    for num, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        found = True
+        total += float(num) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if found else None
+
+
+class RateScheduler:
+    """
+    Requests-per-minute + tokens-per-minute budget for one API key, plus the
+    key's daily request quota.
+    reserve() blocks only as long as the budget says; update() resyncs the
+    budget from the x-ratelimit-* / retry-after response headers; settle()
+    books the tokens a call really used.
+
+    Groq's x-ratelimit-*-requests headers are the requests-per-DAY quota (the
+    *-tokens ones are per minute), so RPM is paced locally from LLM_RPM and the
+    request headers only feed day_left: once it hits 0, day_exhausted() is true
+    and callers stop instead of sleeping until tomorrow.
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM):
+        self.rpm, self.tpm = rpm, tpm
+        self._lock = threading.Lock()
+        now = time.monotonic()
+        self.req_left, self.req_reset = rpm, now + 60
+        self.tok_left, self.tok_reset = tpm, now + 60
+        self.day_left, self.day_reset = None, 0.0  # None until the first response says
+        self.blocked_until = 0.0
+        self.waited = 0.0
+        self.tokens_used = self.calls = 0
+
+    def reserve(self, tokens):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self.req_reset:
+                    self.req_left, self.req_reset = self.rpm, now + 60
+                if now >= self.tok_reset:
+                    self.tok_left, self.tok_reset = self.tpm, now + 60
+                tokens = min(tokens, self.tpm)  # A prompt bigger than the whole minute still has to go
+                if now >= self.blocked_until and self.req_left >= 1 and self.tok_left >= tokens:
+                    self.req_left -= 1
+                    self.tok_left -= tokens
+                    return
+                wait = max(self.blocked_until - now,
+                           self.req_reset - now if self.req_left < 1 else 0,
+                           self.tok_reset - now if self.tok_left < tokens else 0, 0.05)
+                self.waited += wait
+            time.sleep(wait)
+
+    def day_exhausted(self):
+        with self._lock:
+            return self.day_left is not None and self.day_left < 1 and time.monotonic() < self.day_reset
+
+    def settle(self, reserved, used, from_headers=False):
+        """A call reserved `reserved` tokens and used `used`. Without fresh header counts, refund/charge the difference."""
+        with self._lock:
+            self.calls += 1
+            if used is None:
+                return
+            self.tokens_used += used
+            if not from_headers:
+                self.tok_left = min(self.tpm, self.tok_left + reserved - used)
+
+    def update(self, headers):
+        """-> True when the headers carried the remaining-tokens count."""
+        if not headers:
+            return False
+        get = lambda k: headers.get(k) if hasattr(headers, "get") else None
+        now = time.monotonic()
+        synced = False
+        with self._lock:
+            if get("x-ratelimit-limit-tokens"):
+                self.tpm = float(get("x-ratelimit-limit-tokens"))
+            if get("x-ratelimit-remaining-tokens") is not None:
+                self.tok_left = float(get("x-ratelimit-remaining-tokens"))
+                synced = True
+                reset = parse_reset(get("x-ratelimit-reset-tokens"))
+                if reset is not None:
+                    self.tok_reset = now + reset
+            if get("x-ratelimit-remaining-requests") is not None:  # Per day, see the class docstring
+                self.day_left = float(get("x-ratelimit-remaining-requests"))
+                self.day_reset = now + (parse_reset(get("x-ratelimit-reset-requests")) or 0.0)
+            retry = parse_reset(get("retry-after"))
+            if retry:
+                self.blocked_until = max(self.blocked_until, now + retry)
+        return synced
+
+    def backoff(self, seconds):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def groq_llm(client, model=LLM_MODEL):
+    """Adapter: Groq SDK -> llm(messages) returning (text, headers, total_tokens)."""
+    def call(messages):
+        raw = client.chat.completions.with_raw_response.create(
+            messages=messages, model=model, temperature=0.1,
+            response_format={"type": "json_object"},
+        )
+        completion = raw.parse()
+        usage = getattr(completion, "usage", None)
+        return completion.choices[0].message.content, raw.headers, getattr(usage, "total_tokens", None)
+    return call
+
+
+def build_prompt(items):
+    rows = [{"symbol": s, "b": b, "c": c} for s, b, c in items]
+    return ("For each stock, give its broad sector and its future scope in at most 12 words, "
+            "using the two sector hints b and c. Reply with ONLY JSON: "
+            '{"results": [{"symbol": "...", "sector": "...", "scope": "..."}]}\n'
+            + json.dumps(rows, ensure_ascii=False, separators=(",", ":")))
+
+
+def build_scope_prompt(items):
+    rows = [{"symbol": s, "sector": sector} for s, sector in items]
+    return ("For each stock, give its future scope in at most 12 words, "
+            "given its sector. Reply with ONLY JSON: "
+            '{"results": [{"symbol": "...", "scope": "..."}]}\n'
+            + json.dumps(rows, ensure_ascii=False, separators=(",", ":")))
+
+
+def estimate_tokens(prompt, n_items):
+    return len(prompt) // 4 + OUT_TOKENS_PER_ITEM * n_items
+
+
+def parse_results(text, items):
+    data = json.loads(text)
+    rows = data.get("results", data) if isinstance(data, dict) else data
+    out = {}
+    for r in rows or []:
+        sym = str(r.get("symbol", "")).strip().upper()
+        if sym:
+            out[sym] = (str(r.get("sector") or "Manual Check").strip(), str(r.get("scope") or "N/A").strip())
+    return {it[0]: out[it[0].strip().upper()] for it in items if it[0].strip().upper() in out}
+
+
+def parse_scopes(text, items):
+    """Like parse_results, but -> {symbol: scope}; a blank scope counts as not answered."""
+    data = json.loads(text)
+    rows = data.get("results", data) if isinstance(data, dict) else data
+    out = {}
+    for r in rows or []:
+        sym, scope = str(r.get("symbol", "")).strip().upper(), str(r.get("scope") or "").strip()
+        if sym and scope:
+            out[sym] = scope
+    return {it[0]: out[it[0].strip().upper()] for it in items if it[0].strip().upper() in out}
+
+
+def analyze_batch(items, llm, scheduler, max_tries=LLM_MAX_TRIES,
+                  build=build_prompt, parse=parse_results, failed=("RETRY_LATER", "Limit hit")):
+    """
+    items: [(symbol, sector_b, sector_c)] -> {symbol: (sector, scope)}.
+    One prompt for the whole batch. Symbols the model skipped are retried in a
+    smaller batch; unparseable replies are split in half until single items.
+    Symbols still unanswered at the end map to `failed`.
+    """
+    if not items:
+        return {}
+    again = lambda part: analyze_batch(part, llm, scheduler, max_tries, build, parse, failed)
+    prompt = build(items)
+    messages = [{"role": "user", "content": prompt}]
+
+    for attempt in range(max_tries):
+        if scheduler.day_exhausted():
+            print(f"  🛑 Daily request quota used up, {len(items)} symbols left for the next run")
+            break
+        reserved = estimate_tokens(prompt, len(items))
+        with TIMINGS.phase("rate_wait"):
+            scheduler.reserve(reserved)
+        try:
+            with TIMINGS.phase("llm"):
+                text, headers, used = llm(messages)
+            scheduler.settle(reserved, used, from_headers=scheduler.update(headers))
+        except Exception as e:
+            response = getattr(e, "response", None)
+            scheduler.update(getattr(response, "headers", None))
+            if getattr(response, "status_code", None) == 429 or "429" in str(e) or "rate_limit" in str(e):
+                wait_match = re.search(r"try again in ([\d.]+m?s|[\dm.]+s)", str(e))
+                wait = parse_reset(wait_match.group(1)) if wait_match else 2 ** attempt * 5
+                print(f"  ⏳ Rate limited on {len(items)} symbols, backing off {wait:.1f}s")
+                scheduler.backoff(wait)
+            else:
+                print(f"  ⚠️ Error: {e}")
+                scheduler.backoff(2 ** attempt)
+            continue
+
+        try:
+            with TIMINGS.phase("parse"):
+                results = parse(text, items)
+        except (ValueError, AttributeError, TypeError):
+            if len(items) == 1:
+                continue
+            mid = len(items) // 2
+            print(f"  ✂️ Unparseable reply for {len(items)} symbols, splitting")
+            return {**again(items[:mid]), **again(items[mid:])}
+
+        missing = [it for it in items if it[0] not in results]
+        if missing and len(missing) < len(items):
+            results.update(again(missing))
+        elif missing:
+            continue
+        return results
+
+    return {it[0]: failed for it in items}
+
+
+def analyze_scopes(items, llm, scheduler, max_tries=LLM_MAX_TRIES):
+    """
+    items: [(symbol, sector)] -> {symbol: scope}, "" where the model never answered.
+    For rows whose sector came from the memo, local agreement or a shared pair:
+    the scope is about one company, so it is asked for per symbol, still batched.
+    """
+    return analyze_batch(items, llm, scheduler, max_tries, build_scope_prompt, parse_scopes, "")
@@ -0,0 +1,89 @@
+import os, re, json
+import numpy as np
+import pandas as pd
+
+# ---------------- CONFIG ---------------- #
+TYPED_FORMAT = os.getenv("TYPED_FORMAT", "parquet")  # parquet | feather | "" = off
+TYPED_DIR    = os.getenv("TYPED_DIR", "typed")       # One file per run/pass, uploaded next to the sheet
+
+MISSING  = ["", "N/A", "NA", "n/a", "-", "—", "Error", "NO_DATA", "RETRY_LATER", "nan", "None"]
+SUFFIXES = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12, "L": 1e5, "Cr": 1e7}
+MINUSES  = "[\u2212\u2012\u2013\u2014\ufe63\uff0d]"  # Unicode minus / dashes the chart displays
+SPACES   = "[,\\s\u00a0\u202f\u2009]"          # Thousands separators, (narrow) no-break spaces
+NUMBER_RE = (r"^(?P<num>[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+             r"(?P<suffix>" + "|".join(sorted(SUFFIXES, key=len, reverse=True)) + r")?"
+             r"(?P<pct>%)?(?:[A-Z]{3})?$")               # Trailing currency code ("1.2KINR") is dropped
+
+
+def to_numbers(values):
+    """
+    Display strings -> float64, one vectorized pass per column:
+    "1.23K" -> 1230.0, "−4.5%" -> -4.5 (percent points), "∅"/"N/A"/"" -> NaN.
+    -> (numbers, is_percent, unparsed) as Series aligned with `values`
+    """
+    text = pd.Series(values, dtype="string").str.strip()
+    text = text.str.replace("∅", "", regex=False).str.replace(MINUSES, "-", regex=True)
+    text = text.str.replace(SPACES, "", regex=True)
+    missing = text.isna() | text.isin(MISSING)
+    parts = text.where(~missing).str.extract(NUMBER_RE)
+    numbers = pd.to_numeric(parts["num"], errors="coerce").astype("float64")
+    numbers = numbers * parts["suffix"].map(SUFFIXES).astype("float64").fillna(1.0)
+    unparsed = ~missing & numbers.isna()
+    return numbers, parts["pct"].notna(), unparsed
+
+
+def normalize_rows(rows, columns, id_columns=("symbol", "date")):
+    """
+    rows: [[symbol, date, v1, v2, ...]] as written to the sheet -> DataFrame
+    with text id columns and one float64 column per value, named exactly as
+    `columns` in every shard so the files concatenate. Percent columns (any
+    parsed cell ended in %) are listed in attrs["units"] as "percent".
+    """
+    width = len(id_columns) + len(columns)
+    raw = pd.DataFrame([(list(r) + [""] * width)[:width] for r in rows], columns=list(id_columns) + list(columns),
+                       dtype="string")
+    typed = raw[list(id_columns)].copy()
+    bad, units = 0, {}
+    for col in columns:
+        numbers, pct, unparsed = to_numbers(raw[col])
+        typed[col] = numbers.to_numpy(dtype=np.float64)
+        if pct.any():
+            units[col] = "percent"
+        bad += int(unparsed.sum())
+    typed.attrs["unparsed"], typed.attrs["units"] = bad, units
+    return typed
+
+
+def value_columns(names, count):
+    """Screener names when configured (same order as the panel), else v1..vN."""
+    names = [n.replace(".", "_") for n in names][:count]
+    return names + [f"v{n}" for n in range(len(names) + 1, count + 1)]
+
+
+def write_typed(rows, columns, name, fmt=TYPED_FORMAT, out_dir=TYPED_DIR):
+    """
+    Normalize a run's rows and write {out_dir}/{name}.{fmt}; the units go in
+    the schema metadata (b"mv2_units"). -> path, or None when off/unavailable.
+    """
+    if not fmt or not rows:
+        return None
+    typed = normalize_rows(rows, columns)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}.{fmt}")
+    try:
+        import pyarrow as pa
+        table = pa.Table.from_pandas(typed.reset_index(drop=True), preserve_index=False)
+        meta = {**(table.schema.metadata or {}), b"mv2_units": json.dumps(typed.attrs["units"]).encode()}
+        table = table.replace_schema_metadata(meta)
+        if fmt == "feather":
+            from pyarrow import feather
+            feather.write_feather(table, path)
+        else:
+            from pyarrow import parquet
+            parquet.write_table(table, path)
+    except ImportError as e:  # pyarrow is optional: the sheet is still the source of truth
+        print(f"⚠️ Typed output skipped ({e})")
+        return None
+    print(f"🧮 {path}: {len(typed)} rows × {len(columns)} numeric columns "
+          f"({typed.attrs['unparsed']} non-numeric cells → NaN)")
+    return path
@@ -0,0 +1,107 @@
+import os, time, threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from ratelimit import TokenBucket
+from timing import TIMINGS
+
+# ---------------- CONFIG ---------------- #
+NSE_BASE_URL   = os.getenv("NSE_BASE_URL", "https://www.nseindia.com")  # Point at a local fake in tests
+NSE_WORKERS    = int(os.getenv("NSE_WORKERS", "4"))
+NSE_RPS        = float(os.getenv("NSE_RPS", "3"))           # Requests/second across all workers
+NSE_COOKIE_TTL = float(os.getenv("NSE_COOKIE_TTL", "240"))  # Re-prime cookies after this many seconds
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+class NSEClient:
+    """
+    quote-equity lookups over ONE pooled keep-alive session. The nseindia.com
+    cookies the API wants are primed once from the home page, and refreshed
+    when they age out or the API answers 401/403.
+    """
+
+    def __init__(self, base_url=NSE_BASE_URL, workers=NSE_WORKERS, rps=NSE_RPS,
+                 cookie_ttl=NSE_COOKIE_TTL, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.workers, self.cookie_ttl = workers, cookie_ttl
+        self.bucket = TokenBucket(rps, capacity=max(1, workers))
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(HEADERS)
+        self.primed_at = 0.0
+        self.calls = self.primes = 0
+        self.throttled = 0  # 429s, repeated 401/403s and timeouts - the pacing signal for callers
+        self.durations = {}  # symbol -> seconds of its last lookup, for per-symbol timings
+        self._lock = threading.Lock()        # Priming (held across the home-page request)
+        self._count_lock = threading.Lock()  # calls / throttled, bumped from the worker threads
+
+    def _count(self, name):
+        with self._count_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def prime(self, force=False):
+        with self._lock:
+            if not force and time.time() - self.primed_at < self.cookie_ttl:
+                return
+            try:
+                self.bucket.acquire()
+                self.session.get(self.base_url + "/", headers={"Accept": "text/html"}, timeout=10)
+            except Exception as e:
+                print(f"  ⚠️ NSE cookie priming failed: {e}")
+                return  # Not primed: the next lookup tries again
+            self.primes += 1
+            self.primed_at = time.time()
+
+    def sector(self, symbol):
+        """Industry (or sector) for one symbol, None when NSE has nothing."""
+        t0 = time.monotonic()
+        try:
+            return self._sector(symbol)
+        finally:
+            self.durations[symbol] = time.monotonic() - t0
+            TIMINGS.add_phase("nse", self.durations[symbol])
+
+    def _sector(self, symbol):
+        self.prime()
+        for attempt in range(2):
+            self.bucket.acquire()
+            try:
+                resp = self.session.get(self.base_url + "/api/quote-equity", params={"symbol": symbol},
+                                        headers={"Referer": self.base_url + "/"}, timeout=10)
+            except Exception:
+                self._count("throttled")
+                return None
+            self._count("calls")
+            if resp.status_code in (401, 403) and attempt == 0:
+                self.prime(force=True)  # Cookies expired server-side
+                continue
+            if resp.status_code in (401, 403, 429):
+                self._count("throttled")
+            if resp.status_code != 200:
+                return None
+            try:
+                body = resp.json()
+            except ValueError:
+                return None
+            info = body.get('info') if isinstance(body, dict) else None
+            if not isinstance(info, dict):
+                return None  # Error page, list or null info: nothing for this symbol
+            sector = info.get('industry') or info.get('sector')
+            return (sector.strip() or None) if isinstance(sector, str) else None
+        return None
+
+    def fetch_sectors(self, symbols):
+        """{symbol: sector or None} for a whole chunk, NSE_WORKERS requests in flight."""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        self.prime()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nse") as ex:
+            return dict(zip(symbols, ex.map(self.sector, symbols)))
@@ -0,0 +1,90 @@
+import time, threading
+
+
+class TokenBucket:
+    """`rate` tokens per second, bursts up to `capacity`. acquire() blocks until a token is free."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate, self.capacity = rate, capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def failure_kind(error):
+    """Bucket an error message for AdaptiveRate.failure(): 429 | captcha | timeout | empty | error."""
+    text = str(error or "").lower()
+    if "429" in text or "too many" in text:
+        return "429"
+    if "captcha" in text:
+        return "captcha"
+    if "timeout" in text or "timed out" in text:
+        return "timeout"
+    if not text or "no values" in text or "n/a" in text or "no data" in text:
+        return "empty"
+    return "error"
+
+
+class AdaptiveRate:
+    """
+    AIMD pacing shared by all workers of a pipeline. wait() spaces calls at
+    1/rate seconds; success() adds `step` req/s (up to max_rate), failure()
+    multiplies the rate by `backoff` (down to min_rate) - at most once per
+    `cooldown` seconds, so one burst of concurrent failures halves it once.
+    """
+
+    def __init__(self, name, rate, min_rate, max_rate, step=0.05, backoff=0.5, cooldown=5.0, on_change=None):
+        self.name, self.rate = name, rate
+        self.min_rate, self.max_rate = min_rate, max_rate
+        self.step, self.backoff, self.cooldown = step, backoff, cooldown
+        self.on_change = on_change  # on_change(name, rate), e.g. the timing gauge
+        self.failures = {}
+        self._next, self._last_cut = 0.0, float("-inf")
+        self._lock = threading.Lock()
+        self._report()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+        self._report()
+
+    def failure(self, kind="error"):
+        with self._lock:
+            self.failures[kind] = self.failures.get(kind, 0) + 1
+            now = time.monotonic()
+            if now - self._last_cut < self.cooldown:
+                return
+            self._last_cut = now
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            self._next = max(self._next, now + 1.0 / self.rate)
+            rate = self.rate
+        print(f"  🐢 {self.name}: {kind} → backing off to {rate:.2f} req/s")
+        self._report()
+
+    def _report(self):
+        if self.on_change:
+            self.on_change(self.name, self.rate)
+
+    def summary(self):
+        failed = ", ".join(f"{k} {v}" for k, v in sorted(self.failures.items())) or "no failures"
+        return f"🚦 {self.name}: {self.rate:.2f} req/s at the end ({failed})"
@@ -0,0 +1,93 @@
+import os, time, threading
+from timing import TIMINGS
+
+# ---------------- CONFIG ---------------- #
+READY_TIMEOUT   = float(os.getenv("READY_TIMEOUT", "20"))    # Hard cap per wait (seconds)
+READY_STABLE_MS = int(os.getenv("READY_STABLE_MS", "400"))   # Values must stop changing this long
+
+# Resolves as soon as the probe finds enough non-empty values that have not
+# changed for stableMs, or when timeoutMs runs out. A MutationObserver reacts
+# to renders immediately; the interval only ticks the stability clock.
+READY_JS = r"""
+const [kind, probe, minCount, stableMs, timeoutMs, done] = arguments;
+const t0 = performance.now();
+let last = null, lastChange = t0, finished = false, obs = null, timer = null;
+
+function read() {
+  if (kind === "text") {
+    const m = (document.body ? document.body.innerText : "").match(new RegExp(probe, "i"));
+    return m ? [m[0]] : [];
+  }
+  return Array.from(document.querySelectorAll(probe), el => (el.textContent || "").trim());
+}
+
+function finish(ok, values) {
+  if (finished) return;
+  finished = true;
+  if (obs) obs.disconnect();
+  clearInterval(timer);
+  done({ok: ok, values: values, ms: performance.now() - t0});
+}
+
+function check() {
+  const values = read(), now = performance.now(), key = JSON.stringify(values);
+  if (key !== last) { last = key; lastChange = now; }
+  const filled = values.filter(v => v && v !== "∅").length >= minCount;
+  if (filled && document.readyState !== "loading" && now - lastChange >= stableMs) return finish(true, values);
+  if (now - t0 >= timeoutMs) finish(false, values);
+}
+
+obs = new MutationObserver(check);
+obs.observe(document.documentElement, {subtree: true, childList: true, characterData: true});
+timer = setInterval(check, 50);
+check();
+"""
+
+
+class WaitStats:
+    """How long readiness waits really took, per label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = {}
+
+    def add(self, label, seconds, ok):
+        with self._lock:
+            w = self.waits.setdefault(label, {"n": 0, "timeouts": 0, "total": 0.0, "max": 0.0})
+            w["n"] += 1
+            w["timeouts"] += 0 if ok else 1
+            w["total"] += seconds
+            w["max"] = max(w["max"], seconds)
+
+    def summary(self):
+        lines = []
+        for label, w in sorted(self.waits.items()):
+            lines.append(f"⏱️ {label}: {w['n']} waits | avg {w['total'] / w['n']:.2f}s | "
+                         f"max {w['max']:.2f}s | {w['timeouts']} timeouts")
+        return "\n".join(lines) or "⏱️ No readiness waits"
+
+
+STATS = WaitStats()
+
+
+def _wait(driver, kind, probe, min_count, timeout, stable_ms, label):
+    driver.set_script_timeout(timeout + 5)
+    t0 = time.monotonic()
+    try:
+        res = driver.execute_async_script(READY_JS, kind, probe, min_count, stable_ms, int(timeout * 1000))
+    except Exception:
+        res = {"ok": False, "values": []}
+    elapsed = time.monotonic() - t0
+    STATS.add(label, elapsed, res["ok"])
+    TIMINGS.add_phase("wait", elapsed)
+    return res["ok"], res["values"], elapsed
+
+
+def wait_for_values(driver, selector, min_count=1, timeout=READY_TIMEOUT, stable_ms=READY_STABLE_MS, label="values"):
+    """Wait until `min_count` elements matching the CSS selector hold stable text. -> (ok, texts, seconds)"""
+    return _wait(driver, "css", selector, min_count, timeout, stable_ms, label)
+
+
+def wait_for_text(driver, pattern, timeout=READY_TIMEOUT, stable_ms=READY_STABLE_MS, label="text"):
+    """Wait until the page text matches the regex and stops changing. -> (ok, [match], seconds)"""
+    return _wait(driver, "text", pattern, 1, timeout, stable_ms, label)
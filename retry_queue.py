@@ -0,0 +1,91 @@
+import os, time
+
+# ---------------- CONFIG ---------------- #
+RETRY_ATTEMPTS   = int(os.getenv("RETRY_ATTEMPTS", "3"))       # End-of-shard passes over failed symbols
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "10"))  # Seconds before pass 1, doubled each pass
+RETRY_FAILURES   = os.getenv("RETRY_FAILURES", "0") == "1"     # Only re-scrape rows the sheet shows as failed
+RETRY_KEEP_EVERY = float(os.getenv("RETRY_KEEP_EVERY", "60"))  # Seconds between keep() calls for parked jobs
+
+FAILED_MARKERS = {"Error", "N/A", "NO_DATA", "RETRY_LATER"}
+
+
+def is_failed(values):
+    """True for ["Error"] * 6, ["N/A"] * 14, NO_DATA... - every cell a failure marker."""
+    cells = [str(v).strip() for v in values or []]
+    return bool(cells) and all(c in FAILED_MARKERS or not c for c in cells) and any(cells)
+
+
+def failed_rows(rows, first_col=2, last_col=None):
+    """Data-row indexes (0 = sheet row 2) whose value cells [first_col:last_col] are all failures."""
+    return {i for i, row in enumerate(rows) if is_failed(row[first_col:last_col])}
+
+
+class RetryQueue:
+    """
+    Failed jobs parked until the end of the shard instead of being written as
+    errors. drain() retries them with exponential backoff, calling `fresh()`
+    first (e.g. to replace the browser) and yields every job exactly once -
+    with its good result, or the last failure after the final attempt.
+
+    keep(keys), if given, is called at least every `keep_every` seconds while
+    jobs are parked (e.g. to renew their leases, so another shard doesn't
+    steal a row that is only waiting out its backoff). Call touch() from the
+    main loop so parked keys stay kept before drain() starts.
+    """
+
+    def __init__(self, attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY, label="retry",
+                 keep=None, keep_every=RETRY_KEEP_EVERY):
+        self.attempts, self.base_delay, self.label = attempts, base_delay, label
+        self.keep, self.keep_every = keep, keep_every
+        self.pending = {}  # key -> (job, last_result)
+        self.recovered = self.gave_up = 0
+        self._kept = 0.0
+
+    def add(self, key, job, result):
+        self.pending[key] = (job, result)
+        self.touch(force=True)
+
+    def touch(self, force=False):
+        """Run keep() over the parked keys when it's due (or now, with force)."""
+        now = time.monotonic()
+        if self.keep and self.pending and (force or now - self._kept >= self.keep_every):
+            self.keep(list(self.pending))
+            self._kept = now
+
+    def _sleep(self, seconds):
+        end = time.monotonic() + seconds
+        while True:
+            self.touch()
+            left = end - time.monotonic()
+            if left <= 0:
+                return
+            time.sleep(min(left, self.keep_every or left) if self.keep else left)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def drain(self, fn, failed=is_failed, fresh=None):
+        for attempt in range(1, self.attempts + 1):
+            if not self.pending:
+                return
+            delay = self.base_delay * 2 ** (attempt - 1)
+            print(f"🔁 {self.label}: retry {attempt}/{self.attempts} for {len(self.pending)} symbols in {delay:.0f}s")
+            self._sleep(delay)
+            if fresh:
+                fresh()
+            for key, (job, _) in list(self.pending.items()):
+                self.touch()
+                result = fn(job)
+                if failed(result):
+                    self.pending[key] = (job, result)
+                else:
+                    del self.pending[key]
+                    self.recovered += 1
+                    yield job, result
+        for key, (job, result) in list(self.pending.items()):
+            del self.pending[key]
+            self.gave_up += 1
+            yield job, result
+
+    def summary(self):
+        return f"🔁 {self.label}: {self.recovered} recovered on retry, {self.gave_up} still failed"
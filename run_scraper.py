@@ -1,383 +1,383 @@
-import os, time, json, gspread
+import os, sys, argparse
+from functools import partial
 from datetime import date
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
+from clients import sheets_client
+from driver_pool import DriverPool, scrape_in_order, CONCURRENCY
+from sharding import shard_from_env
+from symbol_list import load_symbol_list
+from sheet_writer import SheetWriter
+from sheet_diff import RowDiff
+from readiness import wait_for_values, STATS as WAIT_STATS
+from bulk_fetch import bulk_fetch, columns_from_env, ticker_from_url, BULK_MODE
+from journal import Journal
+from extractor import AdaptiveExtractor, PANEL_SELECTOR
+from timing import TIMINGS
+from chart_session import open_chart, looks_blocked, STATS as SWITCH_STATS
+from ratelimit import AdaptiveRate, failure_kind
+from chrome_watchdog import WATCHDOG
+from retry_queue import RetryQueue, failed_rows, is_failed, RETRY_FAILURES
+from normalize import write_typed, value_columns
 
 # ---------------- CONFIG ---------------- #
-STOCK_LIST_URL = "https://docs.google.com/spreadsheets/d/1V8DsH-R3vdUbXqDKZYWHk_8T0VRjqTEVyj7PhlIDtG4/edit?gid=0#gid=0"
 NEW_MV2_URL    = "https://docs.google.com/spreadsheets/d/1GKlzomaK4l_Yh8pzVtzucCogWW5d-ikVeqCxC6gvBuc/edit?gid=0#gid=0"
 
-# SIMPLE RANGE (REMOVED SHARDING CONFUSION!)
+# RANGE, SPLIT ACROSS SHARD_STEP SHARDS (SHARD_INDEX = this one)
 START_INDEX = int(os.getenv("START_INDEX", "0"))
 END_INDEX   = int(os.getenv("END_INDEX", "2500"))
-CHECKPOINT_FILE = os.getenv("CHECKPOINT_FILE", "checkpoint.txt")
-
-# Resume from checkpoint
-last_i = START_INDEX
-if os.path.exists(CHECKPOINT_FILE):
-    with open(CHECKPOINT_FILE, "r") as f:
-        try:
-            last_i = int(f.read().strip())
-        except:
-            pass
+PASSES      = os.getenv("TV_PASSES", "6,14")  # 6 = price panel, 14 = all values; both write Sheet5
 
-print(f"🔧 Range: {START_INDEX}-{END_INDEX} | Resume: {last_i}")
+# Pass 6
+JOURNAL_FILE = os.getenv("JOURNAL_FILE", "journal.jsonl")  # Scraped rows + sheet-flush marks
+BULK_COLUMNS = columns_from_env("BULK_COLUMNS")  # Screener columns matching the 6 chart values
+TV_RATE     = float(os.getenv("TV_RATE", "1.0"))      # Starting page loads/second per worker (was sleep(1))
+TV_RATE_MAX = float(os.getenv("TV_RATE_MAX", "3.0"))  # AIMD ceiling per worker
 
-# ---------------- GOOGLE SHEETS AUTH ---------------- #
-try:
-    creds_json = os.getenv("GSPREAD_CREDENTIALS")
-    if creds_json:
-        client = gspread.service_account_from_dict(json.loads(creds_json))
-    else:
-        client = gspread.service_account(filename="credentials.json")
-        
-    source_sheet = client.open_by_url(STOCK_LIST_URL).worksheet("Sheet1")
-    dest_sheet   = client.open_by_url(NEW_MV2_URL).worksheet("Sheet5")
-    data_rows = source_sheet.get_all_values()[1:]  # Skip header
-    print("✅ Connected. Reading Sheet1, Writing Sheet5")
-except Exception as e:
-    print(f"❌ Connection Error: {e}")
-    raise
-
-current_date = date.today().strftime("%m/%d/%Y")
-CHROME_SERVICE = Service(ChromeDriverManager().install())
-
-# ---------------- YOUR PROVEN SCRAPER (EXACT!) ---------------- #
-def scrape_tradingview(url):
-    if not url:
-        return []
+# Pass 14
+JOURNAL_FILE_14 = os.getenv("JOURNAL_FILE_14", "journal_14.jsonl")
+BULK_COLUMNS_14 = columns_from_env("BULK_COLUMNS_14")  # Screener columns for the 14-value layout
+TV14_RATE     = float(os.getenv("TV14_RATE", str(1 / 1.8)))  # Starting page loads/second per worker (was sleep(1.8))
+TV14_RATE_MAX = float(os.getenv("TV14_RATE_MAX", "2.0"))
+TV14_MIN_VALUES = int(os.getenv("TV14_MIN_VALUES", "14"))  # Numeric values a page must yield before it counts as read
 
-    opts = Options()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    
-    # YOUR STEALTH OPTIONS (EXACT)
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
-    opts.add_experimental_option("useAutomationExtension", False)
-    opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
+# Learned per run: the strategy that last produced a full row is the fast path for the next page
+PANEL = AdaptiveExtractor("tv6", 6, mode="panel")
+VALUES_14 = AdaptiveExtractor("tv14", 14, min_valid=TV14_MIN_VALUES)
 
-    driver = webdriver.Chrome(service=CHROME_SERVICE, options=opts)
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
 
+# ---------------- GOOGLE SHEETS AUTH ---------------- #
+def open_sheets(client=None):
+    """-> (Sheet1 snapshot, Sheet5). Opened once, shared by both passes."""
     try:
-        # YOUR COOKIES LOGIC (EXACT)
-        if os.path.exists("cookies.json"):
-            driver.get("https://www.tradingview.com/")
-            with open("cookies.json", "r") as f:
-                for c in json.load(f):
-                    try:
-                        driver.add_cookie({
-                            "name": c.get("name"),
-                            "value": c.get("value"),
-                            "domain": c.get("domain", ".tradingview.com"),
-                            "path": c.get("path", "/")
-                        })
-                    except:
-                        pass
-            driver.refresh()
-
-        driver.get(url)
-        
-        # YOUR PROVEN XPATH (EXACT!)
-        WebDriverWait(driver, 40).until(
-            EC.visibility_of_element_located((
-                By.XPATH,
-                '/html/body/div[2]/div/div[5]/div/div[1]/div/div[2]/div[1]/div[2]/div/div[1]/div[2]/div[2]/div[2]/div[2]/div'
-            ))
-        )
-        
-        time.sleep(2)  # YOUR TIMING
-
-        # YOUR EXACT SELECTOR (WORKS!)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        return [
-            el.get_text()
-              .replace('−', '-')
-              .replace('∅', '')
-              .strip()
-            for el in soup.find_all(
-                "div",
-                class_="valueValue-l31H9iuA apply-common-tooltip"
-            )
-        ]
-
+        client = client or sheets_client()
+        symbol_list = load_symbol_list(client)  # Local snapshot while Sheet1 is unchanged
+        dest_sheet = client.open_by_url(NEW_MV2_URL).worksheet("Sheet5")
+        print("✅ Connected. Reading Sheet1, Writing Sheet5")
     except Exception as e:
-        print(f"⚠️ Scrape Fail: {e}")
-        return []
-
-    finally:
-        driver.quit()
-
-# ---------------- YOUR PROVEN MAIN LOOP ---------------- #
-batch, batch_start = [], None
-
-print(f"\n🚀 Processing Rows {START_INDEX+2}-{END_INDEX+2}")
+        print(f"❌ Connection Error: {e}")
+        raise
+    return symbol_list, dest_sheet
 
-for i, row in enumerate(data_rows):  # i starts at 0
-    # SIMPLE RANGE (NO SHARDING!)
-    if i < last_i or i < START_INDEX or i > END_INDEX:
-        continue
 
-    name = row[0]
-    url  = row[3] if len(row) > 3 else ""
-    target_row = i + 2  # YOUR PERFECT MAPPING
+def typed_name(pass_name, shard):
+    """tv6_1400-1499_s2_2024-05-06 -> one typed file per pass, range and shard."""
+    return f"{pass_name}_{START_INDEX}-{END_INDEX}_s{shard.index}_{date.today().isoformat()}"
 
-    if batch_start is None:
-        batch_start = target_row
 
-    print(f"🔎 [{i}] {name} -> Row {target_row}")
+def select_jobs(shard, data_rows, done_rows, dest_sheet):
+    """
+    RANGE -> (candidates, THIS SHARD'S ROWS). candidates: every row of the range
+    still to do; jobs: the shard's share (stride/hash), or with LEASE_DB a lazy
+    generator that claims one row at a time while scraping - never drain it early.
+    """
+    retry_only = None
+    if RETRY_FAILURES:  # Retry-failures mode: only rows Sheet5 shows as Error/N/A
+        retry_only = failed_rows(dest_sheet.get_all_values()[1:])
+        print(f"🔁 Retry-failures mode: {len(retry_only)} failed rows in Sheet5")
+    candidates = [(i, row) for i, row in enumerate(data_rows)  # i starts at 0
+                  if not (i < START_INDEX or i > END_INDEX)
+                  and (i in retry_only if RETRY_FAILURES else i not in done_rows)]
+    return candidates, shard.jobs(candidates)
 
-    # YOUR PROVEN SCRAPER
-    vals = scrape_tradingview(url)
-    row_data = [name, current_date] + (vals if vals else ["Error"] * 6)
-    batch.append(row_data)
 
-    # YOUR BATCH LOGIC (EXACT)
-    if len(batch) >= 5:
-        try:
-            dest_sheet.update(f"A{batch_start}", batch)
-            print(f"💾 Saved rows {batch_start} to {target_row}")
-            batch, batch_start = [], None
-            time.sleep(2)
-        except Exception as e:
-            print(f"❌ Write Error: {e}")
+def no_values(vals):
+    """Pass 6 failure: no panel cell came back. Decides the retry queue and the pacer alike."""
+    return not any(vals or [])
 
-    # YOUR CHECKPOINT (EXACT)
-    with open(CHECKPOINT_FILE, "w") as f:
-        f.write(str(i + 1))
 
-    time.sleep(1)  # YOUR DELAY
-
-# YOUR FINAL FLUSH (EXACT)
-if batch:
-    dest_sheet.update(f"A{batch_start}", batch)
-
-print("\n🏁 Process finished.")
-import os, time, json, gspread
-from datetime import date
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
-import re
+# ---------------- YOUR PROVEN SCRAPER (EXACT!) ---------------- #
+def scrape_tradingview(url, pool):
+    if not url:
+        return []
 
-# ---------------- CONFIG ---------------- #
-STOCK_LIST_URL = "https://docs.google.com/spreadsheets/d/1V8DsH-R3vdUbXqDKZYWHk_8T0VRjqTEVyj7PhlIDtG4/edit?gid=0#gid=0"
-NEW_MV2_URL    = "https://docs.google.com/spreadsheets/d/1GKlzomaK4l_Yh8pzVtzucCogWW5d-ikVeqCxC6gvBuc/edit?gid=0#gid=0"
+    try:
+        # Logged-in session from the pool (cookies injected once per driver)
+        with pool.session() as driver:
+            # Chart app stays loaded per driver: later symbols switch in-page
+            probe = PANEL.probe(PANEL_SELECTOR)
+            open_chart(driver, url, ticker_from_url(url), probe)
+            if looks_blocked(driver):
+                TIMINGS.fail("captcha")
+                return []
+
+            # Values populated + stable (was the 17-level absolute XPath gate + a fixed 2s sleep)
+            wait_for_values(driver, probe, label="tv values")
+
+            # Learned selector first, full strategy search + drift alert when it stops validating
+            with TIMINGS.phase("parse"):
+                return PANEL.extract(driver)
 
-START_INDEX = int(os.getenv("START_INDEX", "0"))
-END_INDEX   = int(os.getenv("END_INDEX", "2500"))
-CHECKPOINT_FILE = os.getenv("CHECKPOINT_FILE", "checkpoint.txt")
+    except Exception as e:
+        print(f"⚠️ Scrape Fail: {e}")
+        TIMINGS.fail(e)
+        return []
 
-# Resume from checkpoint
-last_i = START_INDEX
-if os.path.exists(CHECKPOINT_FILE):
-    try:
-        with open(CHECKPOINT_FILE, "r") as f:
-            last_i = int(f.read().strip())
-    except:
-        pass
-
-print(f"🔧 Range: {START_INDEX}-{END_INDEX} | Resume: {last_i}")
-
-# ---------------- GOOGLE SHEETS ---------------- #
-try:
-    creds_json = os.getenv("GSPREAD_CREDENTIALS")
-    if creds_json:
-        client = gspread.service_account_from_dict(json.loads(creds_json))
-    else:
-        client = gspread.service_account(filename="credentials.json")
-        
-    source_sheet = client.open_by_url(STOCK_LIST_URL).worksheet("Sheet1")
-    dest_sheet   = client.open_by_url(NEW_MV2_URL).worksheet("Sheet5")
-    data_rows = source_sheet.get_all_values()[1:]
-    print(f"✅ Connected. Processing {END_INDEX-START_INDEX+1} symbols")
-except Exception as e:
-    print(f"❌ Connection Error: {e}")
-    raise
-
-current_date = date.today().strftime("%m/%d/%Y")
-CHROME_SERVICE = Service(ChromeDriverManager().install())
 
 # ---------------- ALL 14 VALUES SCRAPER ---------------- #
-def scrape_tradingview(url, symbol_name):
+def scrape_tradingview_14(url, symbol_name, pool):
     if not url:
         print(f"  ❌ No URL for {symbol_name}")
         return [""] * 14  # 14 empty values
-    
-    opts = Options()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--window-size=1920,1080")
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
-    opts.add_experimental_option('useAutomationExtension', False)
-    opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
-    
-    driver = webdriver.Chrome(service=CHROME_SERVICE, options=opts)
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-    
+
     try:
-        print(f"  🌐 {symbol_name[:20]}...")
-        
-        # Cookies
-        if os.path.exists("cookies.json"):
-            driver.get("https://www.tradingview.com/")
-            with open("cookies.json", "r") as f:
-                cookies = json.load(f)
-                for c in cookies[:15]:
-                    try:
-                        driver.add_cookie({
-                            "name": c.get("name"), "value": c.get("value"),
-                            "domain": c.get("domain", ".tradingview.com"), 
-                            "path": c.get("path", "/")
-                        })
-                    except: pass
-            driver.refresh()
-            time.sleep(4)
-        
-        driver.set_page_load_timeout(60)
-        driver.get(url)
-        time.sleep(6)  # Full JS render
-        
-        # **ALL 14 VALUES - MULTIPLE STRATEGIES**
-        all_values = []
-        
-        # Strategy 1: Primary value classes (grab ALL)
-        selectors = [
-            ".valueValue-l31H9iuA.apply-common-tooltip",
-            ".valueValue-l31H9iuA",
-            "div[class*='valueValue']",
-            "div[class*='value']",
-            ".chart-markup-table .value",
-            "[data-value]"
-        ]
-        
-        for selector in selectors:
-            try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    values = []
-                    for el in elements[:20]:  # Grab up to 20
-                        text = el.text.strip().replace('−', '-').replace('∅', '')
-                        if text and len(text) < 25:  # Valid value
-                            values.append(text)
-                    all_values.extend(values)
-                    print(f"  ✅ Selector '{selector}': {len(values)} values")
-            except:
-                continue
-        
-        # Strategy 2: Numeric text extraction
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        numeric_divs = soup.find_all('div', string=re.compile(r'[\d,.-]+'))
-        for div in numeric_divs[:15]:
-            text = div.get_text().strip().replace('−', '-')
-            if re.match(r'^[\d,.-]+.*|.*[\d,.-]+$', text) and len(text) < 25:
-                if text not in all_values:
-                    all_values.append(text)
-        
-        # Strategy 3: Table cells
-        tables = soup.find_all('table')
-        for table in tables[:3]:
-            for cell in table.find_all(['td', 'th'])[:20]:
-                text = cell.get_text().strip().replace('−', '-')
-                if re.match(r'[\d,.-]', text) and len(text) < 25 and text not in all_values:
-                    all_values.append(text)
-        
-        # Deduplicate + Clean
-        unique_values = []
-        for val in all_values:
-            if val and len(val) > 0 and len(val) < 30 and val not in unique_values:
-                unique_values.append(val)
-        
-        # Pad to exactly 14 columns
-        final_values = unique_values[:14]
-        while len(final_values) < 14:
-            final_values.append("N/A")
-        
-        print(f"  📊 {len(unique_values)} unique → {final_values[:3]}...")
-        return final_values
-        
+        with pool.session() as driver:
+            print(f"  🌐 {symbol_name[:20]}...")
+
+            open_chart(driver, url, ticker_from_url(url, symbol_name))  # In-page switch after the first load
+            if looks_blocked(driver):
+                print(f"  🛑 CAPTCHA / bot wall")
+                TIMINGS.fail("captcha")
+                return ["N/A"] * 14
+            # Full JS render: returns once the value panel is filled and stable (was a fixed 6s)
+            ok, _, waited = wait_for_values(driver, VALUES_14.probe(), label="tv14 values")
+            print(f"  {'⚡' if ok else '⏰'} Ready in {waited:.1f}s")
+
+            # **ALL 14 VALUES - MULTIPLE STRATEGIES** (learned subset first, all of them on a miss)
+            with TIMINGS.phase("parse"):
+                final_values = VALUES_14.extract(driver)
+
+            print(f"  📊 {sum(v != 'N/A' for v in final_values)} values → {final_values[:3]}...")
+            return final_values
+
     except TimeoutException:
         print(f"  ⏰ Timeout")
+        TIMINGS.fail("timeout")
         return ["N/A"] * 14
     except Exception as e:
         print(f"  ❌ Error: {e}")
+        TIMINGS.fail(e)
         return ["N/A"] * 14
-    finally:
-        driver.quit()
-
-# ---------------- MAIN LOOP ---------------- #
-batch = []
-batch_start = None
-processed = success_count = 0
-
-print(f"\n🚀 Scraping {END_INDEX-START_INDEX+1} symbols → 14 columns each")
-
-for i, row in enumerate(data_rows):
-    if i < last_i or i < START_INDEX or i > END_INDEX:
-        continue
-    
-    name = row[0].strip()
-    url = row[3] if len(row) > 3 else ""
-    target_row = i + 2
-    
-    if batch_start is None:
-        batch_start = target_row
-    
-    print(f"[{i+1:4d}/{END_INDEX-START_INDEX+1}] {name[:25]} -> Row {target_row}")
-    
-    # Get ALL 14 values
-    vals = scrape_tradingview(url, name)
-    row_data = [name, current_date] + vals  # ALL 14 columns!
-    
-    if any(v != "N/A" for v in vals):
-        success_count += 1
-    
-    batch.append(row_data)
-    processed += 1
-    
-    # Batch write (5 rows × 16 columns)
-    if len(batch) >= 5:
-        try:
-            dest_sheet.update(f"A{batch_start}", batch)
-            print(f"💾 Rows {batch_start}-{target_row} (5×16 cols)")
-            batch = []
-            batch_start = None
-            time.sleep(2)
-        except Exception as e:
-            print(f"❌ Write error: {e}")
-    
-    # Checkpoint
-    with open(CHECKPOINT_FILE, "w") as f:
-        f.write(str(i + 1))
-    
-    time.sleep(1.8)
-
-# Final batch
-if batch and batch_start:
-    try:
-        dest_sheet.update(f"A{batch_start}", batch)
-        print(f"💾 Final: Rows {batch_start}-{target_row}")
-    except Exception as e:
-        print(f"❌ Final write: {e}")
 
-print(f"\n🎉 COMPLETE!")
-print(f"📊 Processed: {processed} | Success: {success_count}")
-print(f"📍 Sheet5: Rows {START_INDEX+2}-{END_INDEX+2} × 16 columns")
-print(f"✅ Success rate: {success_count/processed*100:.1f}%")
+
+# ---------------- YOUR PROVEN MAIN LOOP ---------------- #
+def run_pass6(symbol_list, dest_sheet):
+    # Resume from the journal: replay unflushed rows, never re-scrape journaled ones
+    journal = Journal(JOURNAL_FILE, version=symbol_list["hash"])
+    done_rows = journal.scraped()
+    shard = shard_from_env(version=symbol_list["hash"])
+    print(f"🔧 Range: {START_INDEX}-{END_INDEX} | Journaled: {len(done_rows)} | {shard}")
+    current_date = date.today().strftime("%m/%d/%Y")
+
+    TIMINGS.start_run("tv6")  # Per-symbol phases -> timings.jsonl, summary -> run_summary.json
+    # Sheet5 as it stands, read once: unchanged rows aren't rewritten, changed rows send only their cells
+    diff = RowDiff.fetch(dest_sheet, START_INDEX + 2, END_INDEX + 2, 8, date_col=1)
+    writer = SheetWriter(dest_sheet, diff=diff)  # Write-behind: scraping never waits on Sheets
+    pool = DriverPool(size=CONCURRENCY)  # chromedriver resolved on the first page, not at startup
+    # Shared pacing: speeds up while pages come back full, halves on timeouts/CAPTCHAs/empty panels
+    pacer = AdaptiveRate("tv6", TV_RATE * CONCURRENCY, min_rate=0.1, max_rate=TV_RATE_MAX * CONCURRENCY,
+                         on_change=TIMINGS.gauge)
+
+    typed_rows = []  # Everything written this run, normalized into one columnar file at the end
+
+    def row_written(i):
+        journal.flushed(i)
+        shard.done(i)
+
+    # Scraped before a crash but never confirmed in the sheet -> write, don't re-scrape
+    for i, target_row, row_data in journal.pending():
+        writer.put(target_row, row_data, on_done=partial(row_written, i))
+        typed_rows.append(row_data)
+
+    print(f"\n🚀 Processing Rows {START_INDEX+2}-{END_INDEX+2} ({CONCURRENCY} workers)")
+    candidates, jobs = select_jobs(shard, symbol_list["rows"][1:], done_rows, dest_sheet)
+
+    # BROWSERLESS FIRST: batched screener queries, Selenium only for what they miss
+    bulk = {}
+    if BULK_MODE and BULK_COLUMNS:
+        with TIMINGS.phase("bulk_fetch"):  # Leased: every candidate, rows are claimed lazily below
+            bulk = bulk_fetch(candidates if shard.leased else jobs, BULK_COLUMNS)
+
+    def scrape_job(job):
+        i, row = job
+        name = row[0]
+        if i in bulk:
+            with TIMINGS.symbol(name, row=i + 2, source="bulk"):
+                return bulk[i]
+        url  = row[3] if len(row) > 3 else ""
+        print(f"🔎 [{i}] {name} -> Row {i + 2}")
+
+        # YOUR PROVEN SCRAPER
+        if url:  # No URL = no page load: nothing to pace, nothing to learn
+            pacer.wait()  # Adaptive delay (was a fixed 1s per worker)
+        with TIMINGS.symbol(name, row=i + 2, source="chart", rate=round(pacer.rate, 3)) as rec:
+            vals = scrape_tradingview(url, pool)
+            if no_values(vals) and rec.ok:
+                rec.fail("no values")
+        if url and rec.ok:
+            pacer.success()
+        elif url:
+            pacer.failure(failure_kind(rec.error))
+        return vals
+
+    def emit(i, row, vals):
+        name = row[0]
+        target_row = i + 2  # YOUR PERFECT MAPPING
+
+        row_data = [name, current_date] + (["Error"] * 6 if no_values(vals) else vals)
+        # YOUR CHECKPOINT -> journaled first, marked flushed once the sheet write lands
+        journal.record(i, target_row, row_data)
+
+        # YOUR BATCH LOGIC -> background writer merges rows into batch_update calls
+        writer.put(target_row, row_data, on_done=partial(row_written, i))
+        typed_rows.append(row_data)
+
+    # Results come back in row order, whatever order the workers finish in.
+    # Failed symbols wait in the retry queue; their cells are written after the last attempt.
+    # Parked rows keep their leases while they wait, so no other shard steals them meanwhile.
+    retry = RetryQueue(label="tv6", keep=shard.renew)
+    for (i, row), vals in scrape_in_order(scrape_job, jobs, CONCURRENCY):
+        retry.touch()
+        if no_values(vals) and len(row) > 3 and row[3]:
+            retry.add(i, (i, row), vals)
+            continue
+        emit(i, row, vals)
+
+    for (i, row), vals in retry.drain(scrape_job, failed=no_values,
+                                      fresh=partial(pool.recycle_all, "retry with a fresh browser")):
+        emit(i, row, vals)
+
+    pool.close()
+
+    # YOUR FINAL FLUSH (EXACT)
+    writer.close()
+    journal.finish()  # Every row confirmed -> journal rotated, the next run starts clean
+    write_typed(typed_rows, value_columns(BULK_COLUMNS, 6), typed_name("tv6", shard))
+
+    print(WAIT_STATS.summary())
+    print(SWITCH_STATS.summary())
+    print(PANEL.summary())
+    print(WATCHDOG.summary())
+    print(pacer.summary())
+    print(retry.summary())
+    TIMINGS.write_summary()
+    print("\n🏁 Process finished.")
+
+
+def run_pass14(symbol_list, dest_sheet):
+    # Resume from the journal: replay unflushed rows, never re-scrape journaled ones
+    journal = Journal(JOURNAL_FILE_14, version=symbol_list["hash"])
+    done_rows = journal.scraped()
+    shard = shard_from_env("leases_14", version=symbol_list["hash"])
+    print(f"🔧 Range: {START_INDEX}-{END_INDEX} | Journaled: {len(done_rows)} | {shard}")
+    current_date = date.today().strftime("%m/%d/%Y")
+
+    TIMINGS.start_run("tv14")
+    diff = RowDiff.fetch(dest_sheet, START_INDEX + 2, END_INDEX + 2, 16, date_col=1)  # Read after pass 6 flushed
+    writer = SheetWriter(dest_sheet, diff=diff)  # Write-behind: scraping never waits on Sheets
+    processed = success_count = 0
+    # Cookies (first 15) injected once per driver, not once per symbol
+    pool = DriverPool(size=CONCURRENCY, extra_args=("--disable-gpu", "--window-size=1920,1080"),
+                      cookie_limit=15, page_load_timeout=60)
+    pacer = AdaptiveRate("tv14", TV14_RATE * CONCURRENCY, min_rate=0.1, max_rate=TV14_RATE_MAX * CONCURRENCY,
+                         on_change=TIMINGS.gauge)
+
+    typed_rows = []  # Everything written this run, normalized into one columnar file at the end
+
+    def row_written(i):
+        journal.flushed(i)
+        shard.done(i)
+
+    # Replay rows scraped before a crash that never reached the sheet
+    for i, target_row, row_data in journal.pending():
+        writer.put(target_row, row_data, on_done=partial(row_written, i))
+        typed_rows.append(row_data)
+
+    print(f"\n🚀 Scraping {END_INDEX-START_INDEX+1} symbols → 14 columns each ({CONCURRENCY} workers)")
+    candidates, jobs = select_jobs(shard, symbol_list["rows"][1:], done_rows, dest_sheet)
+
+    # Browserless first, Selenium only for rows the screener cannot resolve
+    bulk = {}
+    if BULK_MODE and BULK_COLUMNS_14:
+        with TIMINGS.phase("bulk_fetch"):  # Leased: every candidate, rows are claimed lazily below
+            bulk = bulk_fetch(candidates if shard.leased else jobs, BULK_COLUMNS_14)
+
+    def scrape_job(job):
+        i, row = job
+        name = row[0].strip()
+        if i in bulk:
+            with TIMINGS.symbol(name, row=i + 2, source="bulk"):
+                return (bulk[i] + ["N/A"] * 14)[:14]
+        url = row[3] if len(row) > 3 else ""
+        print(f"[{i+1:4d}/{END_INDEX-START_INDEX+1}] {name[:25]} -> Row {i + 2}")
+
+        # Get ALL 14 values
+        if url:
+            pacer.wait()  # Adaptive per-symbol delay (was a fixed 1.8s per worker)
+        with TIMINGS.symbol(name, row=i + 2, source="chart", rate=round(pacer.rate, 3)) as rec:
+            vals = scrape_tradingview_14(url, name, pool)
+            if url and all(v == "N/A" for v in vals) and rec.ok:
+                rec.fail("N/A")
+        if url and rec.ok:
+            pacer.success()
+        elif url:  # No URL = nothing was requested, nothing to learn
+            pacer.failure(failure_kind(rec.error))
+        return vals
+
+    def emit(i, row, vals):
+        nonlocal processed, success_count
+        name = row[0].strip()
+        target_row = i + 2
+
+        row_data = [name, current_date] + vals  # ALL 14 columns!
+
+        if any(v != "N/A" for v in vals):
+            success_count += 1
+
+        journal.record(i, target_row, row_data)  # Durable before the (async) sheet write
+        writer.put(target_row, row_data, on_done=partial(row_written, i))
+        typed_rows.append(row_data)
+        processed += 1
+
+    # All-N/A symbols go round again at the end of the shard with a fresh browser
+    retry = RetryQueue(label="tv14", keep=shard.renew)  # Leases renewed while rows wait
+    for (i, row), vals in scrape_in_order(scrape_job, jobs, CONCURRENCY):
+        retry.touch()
+        if is_failed(vals) and len(row) > 3 and row[3]:
+            retry.add(i, (i, row), vals)
+            continue
+        emit(i, row, vals)
+
+    for (i, row), vals in retry.drain(scrape_job, failed=is_failed,
+                                      fresh=partial(pool.recycle_all, "retry with a fresh browser")):
+        emit(i, row, vals)
+
+    pool.close()
+
+    # Final batch
+    writer.close()
+    journal.finish()  # Every row confirmed -> journal rotated, the next run starts clean
+    write_typed(typed_rows, value_columns(BULK_COLUMNS_14, 14), typed_name("tv14", shard))
+
+    print(WAIT_STATS.summary())
+    print(SWITCH_STATS.summary())
+    print(VALUES_14.summary())
+    print(WATCHDOG.summary())
+    print(pacer.summary())
+    print(retry.summary())
+    TIMINGS.write_summary()
+    print(f"\n🎉 COMPLETE!")
+    print(f"📊 Processed: {processed} | Success: {success_count}")
+    print(f"📍 Sheet5: Rows {START_INDEX+2}-{END_INDEX+2} × 16 columns")
+    print(f"✅ Success rate: {success_count/max(processed, 1)*100:.1f}%")
+
+
+PASS_RUNNERS = {"6": run_pass6, "14": run_pass14}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TradingView chart values -> Sheet5 (pass 6, then pass 14)")
+    parser.add_argument("--passes", default=PASSES, help="Comma list of passes to run: 6, 14")
+    args = parser.parse_args(argv)
+    passes = [p.strip() for p in args.passes.split(",") if p.strip()]
+    unknown = [p for p in passes if p not in PASS_RUNNERS]
+    if unknown:
+        parser.error(f"unknown pass {', '.join(unknown)} (choose from {', '.join(PASS_RUNNERS)})")
+
+    symbol_list, dest_sheet = open_sheets()
+    for name in passes:
+        PASS_RUNNERS[name](symbol_list, dest_sheet)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
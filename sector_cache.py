@@ -0,0 +1,60 @@
+import os, json, time, threading
+
+# ---------------- CONFIG ---------------- #
+SECTOR_CACHE_FILE     = os.getenv("SECTOR_CACHE_FILE", "sector_cache.json")
+SECTOR_CACHE_TTL_DAYS = float(os.getenv("SECTOR_CACHE_TTL_DAYS", "30"))  # Sectors barely move
+SECTOR_NEG_TTL_DAYS   = float(os.getenv("SECTOR_NEG_TTL_DAYS", "6"))     # Under the weekly cron: NO_DATA is retried every run
+
+NO_DATA = "NO_DATA"
+
+
+class SectorCache:
+    """
+    symbol -> {"sector", "source", "ts"} in a JSON file that a workflow can
+    keep between runs. NO_DATA results are cached too, with a shorter TTL.
+    """
+
+    def __init__(self, path=SECTOR_CACHE_FILE, ttl_days=SECTOR_CACHE_TTL_DAYS, neg_ttl_days=SECTOR_NEG_TTL_DAYS):
+        self.path = path
+        self.ttl, self.neg_ttl = ttl_days * 86400, neg_ttl_days * 86400
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                print(f"⚠️ Sector cache {path} unreadable, starting empty")
+        print(f"🗂️ Sector cache: {len(self.entries)} symbols from {path}")
+
+    def get(self, symbol):
+        """Cached sector (may be NO_DATA) or None when missing/expired."""
+        with self._lock:
+            e = self.entries.get(symbol)
+            ttl = self.neg_ttl if e and e["sector"] == NO_DATA else self.ttl
+            if e and time.time() - e["ts"] < ttl:
+                self.hits += 1
+                return e["sector"]
+            self.misses += 1
+            return None
+
+    def put(self, symbol, sector, source):
+        with self._lock:
+            self.entries[symbol] = {"sector": sector, "source": source, "ts": time.time()}
+            self._dirty = True
+
+    def save(self):
+        """Atomic rewrite, so a killed job never leaves a half-written cache."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=0, sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def summary(self):
+        return f"🗂️ Sector cache: {self.hits} hits, {self.misses} misses, {len(self.entries)} symbols stored"
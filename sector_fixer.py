@@ -1,91 +1,131 @@
 import os
-import json
+import sys
 import time
-import gspread
-import random
-import re
-from groq import Groq
+import argparse
+from clients import sheets_client
+from sheet_writer import SheetWriter
+from llm_batch import RateScheduler, analyze_batch, analyze_scopes, groq_llm, LLM_BATCH_SIZE
+from sector_memo import SectorMemo, plan
+from timing import TIMINGS
 
 # ---------------- CONFIG ---------------- #
 GROQ_API_KEY = os.getenv("GEMINI_API_KEY") 
 SHEET_URL = "https://docs.google.com/spreadsheets/d/1GKlzomaK4l_Yh8pzVtzucCogWW5d-ikVeqCxC6gvBuc/edit?gid=0#gid=0"
 WORKSHEET_NAME = "Sheet9"
+PENDING_SECTOR = ("", "LIMIT_STILL_ACTIVE", "RETRY_LATER", "Check later")  # Column D values that still need a sector
+PENDING_SCOPE = ("", "N/A", "Limit hit")  # Column E values that still need a future scope
 
-client_ai = Groq(api_key=GROQ_API_KEY)
-
-def get_gspread_client():
-    creds_json = os.getenv("GSPREAD_CREDENTIALS")
-    return gspread.service_account_from_dict(json.loads(creds_json))
-
-client = get_gspread_client()
-sheet = client.open_by_url(SHEET_URL).worksheet(WORKSHEET_NAME)
-
-def analyze_with_groq(symbol, sector_b, sector_c):
-    # SHORTER PROMPT = FEWER TOKENS = NO LIMIT ERRORS
-    prompt = f"Symbol:{symbol}. B:{sector_b}, C:{sector_c}. Task: 1.Broad Sector 2.Future scope (12 words). Format: SECTOR: [Name] SCOPE: [Line]"
-    
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            chat_completion = client_ai.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-                temperature=0.1,
-            )
-            
-            res_text = chat_completion.choices[0].message.content
-            sector, scope = "Manual Check", "N/A"
-            for line in res_text.split('\n'):
-                if "SECTOR:" in line.upper(): sector = line.split(":", 1)[1].strip()
-                if "SCOPE:" in line.upper(): scope = line.split(":", 1)[1].strip()
-            return sector, scope
-
-        except Exception as e:
-            error_str = str(e)
-            # Check for Rate Limit (429)
-            if "429" in error_str or "rate_limit" in error_str:
-                # Look for Groq's suggested wait time in the error message
-                wait_match = re.search(r"retry after ([\d.]+s|[\d.]+ms)", error_str)
-                wait_time = 70 # Default to 70s if we can't find the exact time
-                if wait_match:
-                    wait_str = wait_match.group(1)
-                    wait_time = float(wait_str.replace('s', '')) + 2 if 's' in wait_str else 2
-                
-                print(f"  ⏳ Limit reached for {symbol}. Waiting {wait_time}s to reset tokens...")
-                time.sleep(wait_time)
-            else:
-                print(f"  ⚠️ Error: {e}")
-                time.sleep(10)
-                
-    return "RETRY_LATER", "Limit hit"
+
+_llm = None
+SCHEDULER = RateScheduler()  # One TPM/RPM budget per API key
+
+def default_llm():
+    global _llm
+    if _llm is None:
+        from groq import Groq  # Only runs that actually call the model need the SDK
+        _llm = groq_llm(Groq(api_key=GROQ_API_KEY))
+    return _llm
+
+def analyze_with_groq(symbol, sector_b, sector_c, llm=None):
+    """Single-symbol lookup, kept for ad-hoc use. main() batches instead."""
+    with TIMINGS.symbol(symbol, source="llm") as rec:
+        res = analyze_batch([(symbol, sector_b, sector_c)], llm or default_llm(), SCHEDULER)
+        if symbol not in res:
+            rec.fail("limit hit")
+    return res.get(symbol, ("RETRY_LATER", "Limit hit"))
 
 # ---------------- MAIN ---------------- #
-data = sheet.get_all_values()
-rows = data[1:] 
-
-print(f"🚀 AI Validation with Token-Saving Logic...")
-
-for i, row in enumerate(rows):
-    symbol = row[0]
-    s_b = row[1] if len(row) > 1 else ""
-    s_c = row[2] if len(row) > 2 else ""
-    
-    # Skip already done rows
-    if len(row) > 3 and row[3].strip() not in ["", "LIMIT_STILL_ACTIVE", "RETRY_LATER", "Check later"]:
-        continue
-
-    final_sector, future_scope = analyze_with_groq(symbol, s_b, s_c)
-    row_idx = i + 2
-    
-    # Write INSTANTLY to ensure no data is lost if GitHub crashes
-    try:
-        sheet.update(f"D{row_idx}:E{row_idx}", [[final_sector, future_scope]])
-        print(f"✅ [{i+1}] {symbol} saved.")
-    except Exception as e:
-        print(f"  ❌ GSheet update failed: {e}")
-        time.sleep(5)
-    
-    # Wait 6 seconds between stocks. 10 stocks/minute = safe for free tier TPM.
-    time.sleep(6) 
-
-print("🏁 DONE")
+def main(sheet=None, llm=None, batch_size=LLM_BATCH_SIZE):
+    """sheet/llm are injectable: any worksheet-like object and any llm(messages) -> (text, headers, tokens)."""
+    sheet = sheet or sheets_client().open_by_url(SHEET_URL).worksheet(WORKSHEET_NAME)
+    llm = llm or default_llm()
+    TIMINGS.start_run("fixer")
+    writer = SheetWriter(sheet)  # Rows are merged into batch_update calls in the background
+
+    data = sheet.get_all_values()
+    rows = data[1:]
+
+    print(f"🚀 AI Validation in batches of {batch_size}...")
+
+    todo, need_scope = [], []  # need_scope: (row_idx, symbol, sector) still missing column E
+    for i, row in enumerate(rows):
+        symbol = row[0]
+        s_b = row[1] if len(row) > 1 else ""
+        s_c = row[2] if len(row) > 2 else ""
+        sector = row[3].strip() if len(row) > 3 else ""
+        scope = row[4].strip() if len(row) > 4 else ""
+
+        # A row is done only when both D and E are filled
+        if not symbol.strip():
+            continue
+        if sector in PENDING_SECTOR:
+            todo.append((i + 2, symbol, s_b, s_c))
+        elif scope in PENDING_SCOPE:
+            need_scope.append((i + 2, symbol, sector))
+
+    memo = SectorMemo()
+    resolved, groups = plan(todo, memo)
+    row_symbol = {row_idx: symbol for row_idx, symbol, _, _ in todo}
+    need_scope += [(row_idx, row_symbol[row_idx], sector) for row_idx, sector in sorted(resolved.items())]
+    print(f"🧮 {len(todo)} rows: {len(resolved)} resolved without the LLM, "
+          f"{sum(map(len, groups.values()))} rows share {len(groups)} new (B, C) pairs")
+
+    # One representative row per pair goes to the LLM; its sector fans out to the whole group,
+    # its future scope (about that one company) only to itself - the others ask for theirs below
+    reps = [(key, members[0]) for key, members in groups.items()]
+    start = time.time()
+    for b in range(0, len(reps), batch_size):
+        batch = reps[b:b + batch_size]
+        t0 = time.monotonic()
+        results = analyze_batch([(sym, s_b, s_c) for _, (_, sym, s_b, s_c) in batch], llm, SCHEDULER)
+        batch_seconds = time.monotonic() - t0
+        for key, (rep_idx, symbol, _, _) in batch:
+            final_sector, future_scope = results.get(symbol, ("RETRY_LATER", "Limit hit"))
+            memo.put(key, final_sector)
+            # Queued for the background writer (flushed on exit/SIGTERM so nothing is lost)
+            for row_idx, row_sym, _, _ in groups[key]:
+                if row_idx != rep_idx and final_sector != "RETRY_LATER":
+                    need_scope.append((row_idx, row_sym, final_sector))
+                    continue
+                with TIMINGS.symbol(row_sym, source="llm", batch=len(batch)) as rec:
+                    rec.carry("llm_batch", batch_seconds)  # Shared by every symbol in the prompt
+                    if final_sector == "RETRY_LATER":
+                        rec.fail("limit hit")
+                    writer.put(row_idx, [final_sector, future_scope], col="D")
+        memo.save()
+        print(f"✅ [{b + len(batch)}/{len(reps)}] {len(batch)} pairs queued.")
+
+    # Sector known, scope not: scope-only prompts, same batching and budget.
+    # An unanswered scope stays blank so the next run asks again.
+    for b in range(0, len(need_scope), batch_size):
+        batch = need_scope[b:b + batch_size]
+        t0 = time.monotonic()
+        scopes = analyze_scopes([(sym, sector) for _, sym, sector in batch], llm, SCHEDULER)
+        batch_seconds = time.monotonic() - t0
+        for row_idx, symbol, sector in batch:
+            with TIMINGS.symbol(symbol, source="llm_scope", batch=len(batch)) as rec:
+                rec.carry("llm_batch", batch_seconds)
+                if not scopes.get(symbol):
+                    rec.fail("limit hit")
+                writer.put(row_idx, [sector, scopes.get(symbol, "")], col="D")
+        print(f"✅ [{b + len(batch)}/{len(need_scope)}] future scopes queued.")
+
+    writer.close()
+    memo.save()
+    print(memo.summary())
+    print(f"⏱️ {len(reps)} pairs + {len(need_scope)} scopes in {time.time() - start:.0f}s, {SCHEDULER.waited:.0f}s waiting on rate limits, "
+          f"{SCHEDULER.calls} calls / {SCHEDULER.tokens_used} tokens")
+    TIMINGS.write_summary()
+    print("🏁 DONE")
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Fill Sheet9 Final Sector / Future Scope (memo first, batched LLM for the rest)")
+    parser.add_argument("--batch-size", type=int, default=LLM_BATCH_SIZE, help="Symbols per LLM request")
+    args = parser.parse_args(argv)
+    main(batch_size=args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
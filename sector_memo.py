@@ -0,0 +1,134 @@
+import os, re, json, time, threading
+
+# ---------------- CONFIG ---------------- #
+SECTOR_MEMO_FILE = os.getenv("SECTOR_MEMO_FILE", "sector_memo.json")
+SOLO = "solo:"  # Group key of a row that is never shared or memoized (a blank side)
+
+BLANKS = {"", "na", "n a", "nan", "none", "null", "no data", "error", "check later", "manual check", "not found"}
+NOISE  = {"sector", "industry", "industries", "ltd", "limited", "the", "and", "others", "other"}
+SYNONYMS = {
+    "it": "information technology", "infotech": "information technology",
+    "software": "information technology", "it services": "information technology",
+    "pharma": "pharmaceutical", "pharmaceuticals": "pharmaceutical",
+    "fmcg": "consumer goods", "auto": "automobile", "automobiles": "automobile",
+    "psu bank": "bank", "banking": "bank", "private bank": "bank", "public sector bank": "bank",
+    "nbfc": "finance", "financial services": "finance", "financials": "finance",
+    "realty": "real estate", "telecom": "telecommunication", "telecommunications": "telecommunication",
+}
+
+
+def normalize_sector(name):
+    """'Banks ' / 'BANKING' / 'Private Sector Bank' -> 'bank'. '' for empty / placeholder values."""
+    text = re.sub(r"[^a-z0-9]+", " ", (name or "").lower().replace("&", " and ")).strip()
+    if text in BLANKS:
+        return ""
+    text = SYNONYMS.get(text, text)
+    words = [w for w in text.split() if w not in NOISE]
+    words = [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+    text = " ".join(words)
+    return SYNONYMS.get(text, text)
+
+
+def pair_key(sector_b, sector_c):
+    """Order-free key, so (Banks, Finance) and (finance, BANKS) share one classification.
+    None when either side is blank: the LLM then decides from the symbol, which no other row shares."""
+    nb, nc = normalize_sector(sector_b), normalize_sector(sector_c)
+    if not nb or not nc:
+        return None
+    return "|".join(sorted((nb, nc)))
+
+
+def memoizable(key):
+    """Only real pairs: never a SOLO row or a key with a blank side ("|", "|bank")."""
+    return bool(key) and not key.startswith(SOLO) and all(key.split("|"))
+
+
+def local_sector(sector_b, sector_c):
+    """The sector when both sources agree after normalization, else None."""
+    nb, nc = normalize_sector(sector_b), normalize_sector(sector_c)
+    if nb and nb == nc:
+        return sector_b.strip() if len(sector_b.strip()) <= len(sector_c.strip()) else sector_c.strip()
+    return None
+
+
+class SectorMemo:
+    """
+    pair_key -> {"sector", "ts"} in a JSON file the validator keeps between
+    weekly runs, so a (B, C) combination is only ever sent to the LLM once.
+    The future scope is about one company, so it is never memoized.
+    """
+
+    def __init__(self, path=SECTOR_MEMO_FILE):
+        self.path = path
+        self.hits = self.local = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                print(f"⚠️ Sector memo {path} unreadable, starting empty")
+        poisoned = [k for k in self.entries if not memoizable(k)]  # Blank pairs memoized by older runs
+        for key in poisoned:
+            del self.entries[key]
+        self._dirty = bool(poisoned)
+        print(f"🧠 Sector memo: {len(self.entries)} pairs from {path}")
+
+    def get(self, key):
+        with self._lock:
+            e = self.entries.get(key)
+            if e:
+                self.hits += 1
+                return e["sector"]
+            return None
+
+    def put(self, key, sector):
+        if sector in ("RETRY_LATER", "Manual Check") or not memoizable(key):
+            return  # Failures are retried next run; blank pairs belong to one symbol
+        with self._lock:
+            self.entries[key] = {"sector": sector, "ts": time.time()}
+            self._dirty = True
+
+    def save(self):
+        """Atomic rewrite, same as the sector cache."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=0, sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def summary(self):
+        return f"🧠 Sector memo: {self.local} agreed locally, {self.hits} memo hits, {len(self.entries)} pairs stored"
+
+
+def plan(rows, memo):
+    """
+    rows: [(row_idx, symbol, sector_b, sector_c)]
+    -> (resolved {row_idx: sector}, groups {pair_key: [rows]}) where
+    groups holds only the combinations that still need the LLM, one entry per pair.
+    Resolved rows still need their own future scope (it is per company, never memoized).
+    A row with a blank side is its own group (SOLO key), never shared or memoized.
+    """
+    resolved, groups = {}, {}
+    for row in rows:
+        row_idx, _, s_b, s_c = row
+        key = pair_key(s_b, s_c)
+        if key is None:
+            groups[f"{SOLO}{row_idx}"] = [row]
+            continue
+        cached = memo.get(key)
+        if cached:
+            resolved[row_idx] = cached
+            continue
+        agreed = local_sector(s_b, s_c)
+        if agreed:
+            memo.local += 1
+            resolved[row_idx] = agreed
+            continue
+        groups.setdefault(key, []).append(row)
+    return resolved, groups
@@ -0,0 +1,179 @@
+import os, re, json, time, socket, sqlite3, threading, zlib
+
+# ---------------- CONFIG ---------------- #
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_STEP  = int(os.getenv("SHARD_STEP", "1"))
+SHARD_MODE  = os.getenv("SHARD_MODE", "stride")   # stride: i % STEP | hash: crc32(symbol) % STEP
+LEASE_DB    = os.getenv("LEASE_DB", "")           # SQLite file shared by the shards -> work stealing
+LEASE_TTL   = int(os.getenv("LEASE_TTL", "300"))  # Seconds before an unfinished claim can be stolen
+SHARD_PLAN  = os.getenv("SHARD_PLAN", "shard_plan.json")  # Written once per run by symbol_list.py
+LEASE_RUN   = os.getenv("LEASE_RUN") or os.getenv("GITHUB_RUN_ID", "")  # Shared by the shards of one run; "" = UTC date
+
+
+def shard_of(i, key, step, mode=SHARD_MODE):
+    if mode == "hash":
+        # crc32 is stable across processes (hash() is salted per run)
+        return zlib.crc32(str(key).strip().upper().encode()) % step
+    return i % step
+
+
+def plan_shards(keys, step, mode=SHARD_MODE):
+    """keys[i] = symbol of data row i -> {"shard": [row indexes]} (JSON-ready)."""
+    shards = {str(n): [] for n in range(step)}
+    for i, key in enumerate(keys):
+        shards[str(shard_of(i, key, step, mode))].append(i)
+    return shards
+
+
+def load_plan(path=SHARD_PLAN, version=None, step=SHARD_STEP, mode=SHARD_MODE):
+    """{row index: shard} from a plan file, None when missing, stale (other snapshot) or for another layout."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if plan.get("step") != step or plan.get("mode") != mode or (version and plan.get("hash") != version):
+        print(f"⚠️ {path} is for another symbol list or shard layout, computing shards locally")
+        return None
+    return {i: int(n) for n, rows in plan["shards"].items() for i in rows}
+
+
+class Shard:
+    """Static assignment: this shard scrapes every job whose home() is its index."""
+    leased = False
+
+    def __init__(self, index=SHARD_INDEX, step=SHARD_STEP, mode=SHARD_MODE, plan=None):
+        if not 0 <= index < step:
+            raise ValueError(f"SHARD_INDEX {index} outside 0..{step - 1}")
+        self.index, self.step, self.mode = index, step, mode
+        self.plan = plan  # {i: shard} from the plan step; rows it doesn't know fall back to shard_of()
+
+    def home(self, i, key):
+        if self.plan and i in self.plan:
+            return self.plan[i]
+        return shard_of(i, key, self.step, self.mode)
+
+    def owns(self, i, key):
+        return self.step <= 1 or self.home(i, key) == self.index
+
+    def jobs(self, jobs):
+        """jobs: iterable of (i, row) with the symbol in row[0]."""
+        return [(i, row) for i, row in jobs if self.owns(i, row[0] if row else "")]
+
+    def done(self, i):
+        pass
+
+    def renew(self, rows):
+        pass
+
+    def __str__(self):
+        return f"shard {self.index}/{self.step} ({self.mode}{', planned' if self.plan else ''})"
+
+
+class SQLiteLeaseStore:
+    """
+    Lease table in a local SQLite file. Any object with the same
+    seed / claim / renew / complete methods can be passed to LeaseShard instead.
+    """
+
+    def __init__(self, path, table="leases"):
+        self.table = table
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+            i INTEGER PRIMARY KEY, shard INTEGER, owner TEXT, expires REAL, done INTEGER DEFAULT 0)""")
+
+    def seed(self, items):
+        """items: [(i, home_shard)]. Existing rows (and their progress) are kept: the table is per run, see lease_table()."""
+        with self._lock:
+            self.db.executemany(f"INSERT OR IGNORE INTO {self.table} (i, shard, expires) VALUES (?, ?, 0)", items)
+
+    def claim(self, owner, shard, ttl, lo, hi):
+        """Next row in lo..hi: own shard before other shards, free before expired leases."""
+        now = time.time()
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.db.execute(
+                    f"SELECT i FROM {self.table} WHERE done = 0 AND i BETWEEN ? AND ? AND (owner IS NULL OR expires < ?) "
+                    "ORDER BY (shard != ?), (owner IS NOT NULL), i LIMIT 1", (lo, hi, now, shard)).fetchone()
+                if row:
+                    self.db.execute(f"UPDATE {self.table} SET owner = ?, expires = ? WHERE i = ?", (owner, now + ttl, row[0]))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        return row[0] if row else None
+
+    def renew(self, rows, owner, ttl):
+        """Extend this owner's unfinished leases on rows (e.g. parked for a retry)."""
+        expires = time.time() + ttl
+        with self._lock:
+            self.db.executemany(f"UPDATE {self.table} SET expires = ? WHERE i = ? AND owner = ? AND done = 0",
+                                [(expires, i, owner) for i in rows])
+
+    def complete(self, i):
+        with self._lock:
+            self.db.execute(f"UPDATE {self.table} SET done = 1 WHERE i = ?", (i,))
+
+
+class LeaseShard(Shard):
+    """
+    Dynamic assignment through a shared lease store: each shard works through
+    its own stride first, then steals unclaimed or expired work from the others,
+    so fast shards finish what slow or dead ones left behind.
+    """
+    leased = True
+
+    def __init__(self, store, index=SHARD_INDEX, step=SHARD_STEP, mode=SHARD_MODE, ttl=LEASE_TTL, owner=None, plan=None):
+        super().__init__(index, step, mode, plan)
+        self.store, self.ttl = store, ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{index}"
+        self.stolen = 0
+
+    def jobs(self, jobs):
+        by_i = {i: row for i, row in jobs}
+        self.store.seed([(i, self.home(i, row[0] if row else "")) for i, row in by_i.items()])
+        if not by_i:
+            return
+        lo, hi = min(by_i), max(by_i)
+        while True:
+            i = self.store.claim(self.owner, self.index, self.ttl, lo, hi)
+            if i is None:
+                return
+            if i not in by_i:
+                continue  # Skipped by this shard's resume point
+            if not self.owns(i, by_i[i][0] if by_i[i] else ""):
+                self.stolen += 1
+                print(f"🤝 Stealing row {i + 2} from another shard")
+            yield i, by_i[i]
+
+    def done(self, i):
+        self.store.complete(i)
+
+    def renew(self, rows):
+        """Rows this shard still holds but hasn't finished: not stealable for another ttl."""
+        self.store.renew(list(rows), self.owner, self.ttl)
+
+    def __str__(self):
+        return f"{super().__str__()} + leases"
+
+
+def lease_table(table, version=None, run=None):
+    """
+    leases -> leases_<version>_<run>: done=1 rows from an earlier run or another
+    symbol snapshot (row i = a different symbol) never hide work from this one.
+    """
+    run = run or LEASE_RUN or time.strftime("%Y%m%d", time.gmtime())
+    return re.sub(r"\W", "_", f"{table}_{version or 'any'}_{run}")
+
+
+def shard_from_env(table="leases", version=None):
+    """One lease table per pass over the range. version = hash of the symbol list the rows come from."""
+    plan = load_plan(version=version) if SHARD_STEP > 1 else None
+    if LEASE_DB:
+        return LeaseShard(SQLiteLeaseStore(LEASE_DB, lease_table(table, version)), plan=plan)
+    return Shard(plan=plan)
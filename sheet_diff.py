@@ -0,0 +1,111 @@
+import os, threading
+from timing import TIMINGS
+
+# ---------------- CONFIG ---------------- #
+WRITE_CHANGED_ONLY = os.getenv("WRITE_CHANGED_ONLY", "1") == "1"  # 0 = rewrite every row, as before
+DIFF_DATE = os.getenv("DIFF_DATE", "always")  # always: date = last scraped (one cell per row) | changed: last changed
+
+
+def col_index(col):
+    """"A" -> 0, "P" -> 15, "AA" -> 26."""
+    n = 0
+    for ch in col.upper():
+        n = n * 26 + ord(ch) - ord("A") + 1
+    return n - 1
+
+
+def col_letter(index):
+    """0 -> "A", 26 -> "AA"."""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def _cell(value):
+    return "" if value is None else str(value)
+
+
+class RowDiff:
+    """
+    What the destination block looks like right now, read ONCE per shard,
+    so SheetWriter only sends the cells a run actually changes.
+
+        diff = RowDiff.fetch(sheet, first_row, last_row, width, date_col=1)
+        writer = SheetWriter(sheet, diff=diff)
+
+    date_col (0-based, within the row) never counts as a change. With
+    DIFF_DATE=always (default) it is still written on its own when the values
+    are unchanged, so the column keeps meaning "last scraped"; DIFF_DATE=changed
+    writes it only together with changed cells ("last changed").
+
+    The cached block only moves forward in commit(), from the writer's success
+    path: a row whose write failed is compared with what the sheet really holds.
+    """
+
+    def __init__(self, current=None, date_col=None, date_policy=DIFF_DATE, label="sheet"):
+        self.current = current if current is not None else {}  # sheet row -> [cell, ...]
+        self.date_col, self.date_policy, self.label = date_col, date_policy, label
+        self.rows = self.unchanged = self.cells = self.cells_sent = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fetch(cls, sheet, first_row, last_row, width, date_col=None, date_policy=DIFF_DATE, label=None):
+        """One read of A{first_row}:{width}{last_row}. None (= write everything) when it fails or is switched off."""
+        label = label or getattr(sheet, "title", "sheet")
+        if not WRITE_CHANGED_ONLY or last_row < first_row:
+            return None
+        a1 = f"A{first_row}:{col_letter(width - 1)}{last_row}"
+        try:
+            with TIMINGS.phase("sheet_read"):
+                block = sheet.get(a1)
+        except Exception as e:
+            print(f"⚠️ {label}: couldn't read {a1} for the diff ({e}), writing every row")
+            return None
+        current = {first_row + k: [_cell(v) for v in row] for k, row in enumerate(block)}
+        print(f"🔍 {label}: {a1} read once, {sum(1 for r in current.values() if any(r))} filled rows to diff against")
+        return cls(current, date_col, date_policy, label)
+
+    def changes(self, row_no, values, col="A"):
+        """-> [(start column, values), ...] to write for this row; [] = identical to the sheet."""
+        base = col_index(col)
+        new = [_cell(v) for v in values]
+        with self._lock:
+            old = self.current.get(row_no, [])
+            old = old[base:base + len(new)] + [""] * max(0, base + len(new) - len(old))
+            changed = [k for k, (a, b) in enumerate(zip(old, new)) if a != b and k != self.date_col]
+            date_moved = self.date_col is not None and self.date_col < len(new) and old[self.date_col] != new[self.date_col]
+            if date_moved and (changed or self.date_policy == "always"):
+                changed = sorted(changed + [self.date_col])
+
+            self.rows += 1
+            self.cells += len(new)
+            self.cells_sent += len(changed)
+            if changed in ([], [self.date_col]):
+                self.unchanged += 1  # Values as in the sheet (at most the date moves)
+            if not changed:
+                return []
+
+        runs = []  # Contiguous changed cells -> one range each
+        for k in changed:
+            if runs and runs[-1][1] == k:
+                runs[-1][1] = k + 1
+            else:
+                runs.append([k, k + 1])
+        return [(col_letter(base + lo), new[lo:hi]) for lo, hi in runs]
+
+    def commit(self, row_no, segments):
+        """The segments of row_no are in the sheet now."""
+        with self._lock:
+            row = self.current.setdefault(row_no, [])
+            for col, values in segments:
+                base = col_index(col)
+                row.extend([""] * max(0, base + len(values) - len(row)))
+                row[base:base + len(values)] = [_cell(v) for v in values]
+
+    def summary(self):
+        saved = 100 * (1 - self.cells_sent / self.cells) if self.cells else 0.0
+        return (f"🔍 {self.label} diff: {self.unchanged}/{self.rows} rows unchanged, "
+                f"{self.cells_sent}/{self.cells} cells sent ({saved:.0f}% saved)")
@@ -0,0 +1,166 @@
+import os, sys, time, queue, atexit, signal, threading
+from ratelimit import TokenBucket
+from timing import TIMINGS
+
+# ---------------- CONFIG ---------------- #
+SHEETS_WRITES_PER_MIN = float(os.getenv("SHEETS_WRITES_PER_MIN", "50"))  # Quota is 60/min/user
+SHEETS_MAX_RETRIES    = int(os.getenv("SHEETS_MAX_RETRIES", "6"))
+WRITE_BATCH_ROWS      = int(os.getenv("WRITE_BATCH_ROWS", "25"))   # Rows per batch_update
+WRITE_LINGER          = float(os.getenv("WRITE_LINGER", "3"))      # Seconds to wait for more rows
+
+
+def coalesce(rows):
+    """[(sheet_row, values), ...] -> [(first_row, [values, ...]), ...] with consecutive rows merged."""
+    blocks = []
+    for row_no, values in sorted(rows, key=lambda r: r[0]):
+        if blocks and blocks[-1][0] + len(blocks[-1][1]) == row_no:
+            blocks[-1][1].append(values)
+        else:
+            blocks.append((row_no, [values]))
+    return blocks
+
+
+# One bucket per process: every writer shares the same Sheets quota
+SHEETS_BUCKET = TokenBucket(SHEETS_WRITES_PER_MIN / 60.0, capacity=5)
+
+
+class _Marker:
+    def __init__(self, stop=False):
+        self.stop = stop
+        self.event = threading.Event()
+
+
+class SheetWriter:
+    """
+    Write-behind for one worksheet. put() only enqueues; a background thread
+    merges queued rows (contiguous or not) into one batch_update, waits for
+    the shared token bucket and retries with exponential backoff. Pending rows
+    are flushed by close(), at interpreter exit and on SIGTERM. With a RowDiff
+    only the cells that differ from the sheet are sent.
+
+        writer = SheetWriter(dest_sheet, diff=RowDiff.fetch(dest_sheet, ...))
+        writer.put(row_no, values, on_done=callback)
+        writer.close()
+    """
+
+    def __init__(self, sheet, batch_rows=WRITE_BATCH_ROWS, linger=WRITE_LINGER,
+                 bucket=SHEETS_BUCKET, max_retries=SHEETS_MAX_RETRIES, label=None, diff=None):
+        self.sheet, self.diff = sheet, diff
+        self.batch_rows, self.linger = batch_rows, linger
+        self.bucket, self.max_retries = bucket, max_retries
+        self.label = label or getattr(sheet, "title", "sheet")
+        self.calls = self.rows_written = 0
+        self.failed = []  # (row_no, values, col) that never made it
+        self._q = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"writer-{self.label}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        _install_sigterm()
+
+    def put(self, row_no, values, col="A", on_done=None):
+        """Queue one row starting at column `col`; on_done() runs after it is written
+        (right away when the diff finds nothing to write)."""
+        segments = self.diff.changes(row_no, values, col) if self.diff else [(col, values)]
+        if segments:
+            self._q.put((row_no, segments, on_done))
+        else:
+            self._done([(row_no, segments, on_done)])
+
+    def flush(self):
+        """Block until everything queued so far is written (or given up on)."""
+        if self._closed:
+            return
+        m = _Marker()
+        self._q.put(m)
+        m.event.wait()
+
+    def close(self):
+        if self._closed:
+            return
+        m = _Marker(stop=True)
+        self._q.put(m)
+        m.event.wait()
+        self._closed = True
+        print(f"💾 {self.label}: {self.rows_written} rows in {self.calls} batch_update calls"
+              + (f" | ❌ {len(self.failed)} rows failed" if self.failed else ""))
+        if self.diff:
+            print(self.diff.summary())
+
+    def _run(self):
+        pending = []
+        while True:
+            item = self._q.get()
+            deadline = time.monotonic() + self.linger
+            while not isinstance(item, _Marker):
+                pending.append(item)
+                if len(pending) >= self.batch_rows:
+                    break
+                try:
+                    item = self._q.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if pending:
+                self._write(pending)
+                pending = []
+            if isinstance(item, _Marker):
+                item.event.set()
+                if item.stop:
+                    return
+
+    def _write(self, items):
+        by_col = {}
+        for row_no, segments, _ in items:
+            for col, values in segments:
+                by_col.setdefault(col, {})[row_no] = values  # Last write for a row wins
+        data = [
+            {"range": f"{col}{start}", "values": block}
+            for col, rows in by_col.items()
+            for start, block in coalesce(rows.items())
+        ]
+
+        for attempt in range(self.max_retries + 1):
+            with TIMINGS.phase("sheet_quota"):
+                self.bucket.acquire()
+            try:
+                with TIMINGS.phase("sheet_write"):
+                    self.sheet.batch_update(data)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"❌ {self.label}: giving up on {len(items)} rows: {e}")
+                    self.failed.extend((r, v, c) for r, segments, _ in items for c, v in segments)
+                    return
+                wait = min(64, 2 ** attempt) * (2 if "429" in str(e) else 1)
+                print(f"⏳ {self.label}: write failed ({e}), retry in {wait}s")
+                time.sleep(wait)
+
+        self.calls += 1
+        self.rows_written += len(items)
+        if self.diff:
+            for row_no, segments, _ in items:
+                self.diff.commit(row_no, segments)
+        rows = sorted(r for r, _, _ in items)
+        print(f"💾 {self.label}: rows {rows[0]}-{rows[-1]} ({len(items)} rows, {len(data)} ranges)")
+        self._done(items)
+
+    def _done(self, items):
+        for _, _, on_done in items:
+            if on_done:
+                try:
+                    on_done()
+                except Exception as e:
+                    print(f"⚠️ {self.label}: post-write callback failed: {e}")
+
+
+_sigterm_installed = False
+
+
+def _install_sigterm():
+    """Turn SIGTERM (Actions cancel / timeout) into SystemExit so atexit flushes the writers."""
+    global _sigterm_installed
+    if _sigterm_installed or threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) in (signal.SIG_DFL, None):
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    _sigterm_installed = True
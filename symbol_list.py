@@ -0,0 +1,140 @@
+import os, sys, json, time, hashlib, argparse
+from clients import sheets_client
+from sharding import plan_shards, SHARD_STEP, SHARD_MODE
+
+# ---------------- CONFIG ---------------- #
+STOCK_LIST_URL  = "https://docs.google.com/spreadsheets/d/1V8DsH-R3vdUbXqDKZYWHk_8T0VRjqTEVyj7PhlIDtG4/edit?gid=0#gid=0"
+SYMBOL_SOURCE   = os.getenv("SYMBOL_SOURCE", "auto")    # auto | sheet | snapshot | xlsx
+SNAPSHOT_FILE   = os.getenv("SYMBOL_SNAPSHOT", "symbols_snapshot.json")
+SNAPSHOT_MAX_AGE = float(os.getenv("SYMBOL_SNAPSHOT_MAX_AGE", "6"))  # Hours to trust a snapshot when Drive can't say
+STOCK_LIST_XLSX = os.getenv("STOCK_LIST_XLSX", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          "Stock List  (3).xlsx"))  # Offline copy, last resort
+SHARD_PLAN_FILE = os.getenv("SHARD_PLAN", "shard_plan.json")
+
+
+def content_hash(rows):
+    return hashlib.sha256(json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """{"hash", "source", "modified", "fetched", "rows"} or None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snap = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Symbol snapshot unreadable ({e}), ignoring it")
+        return None
+    return snap if snap.get("rows") and snap.get("hash") == content_hash(snap["rows"]) else None
+
+
+def save_snapshot(rows, source, modified=None, path=SNAPSHOT_FILE):
+    snap = {"hash": content_hash(rows), "source": source, "modified": modified,
+            "fetched": time.time(), "rows": rows}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snap, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return snap
+
+
+def read_xlsx(path=STOCK_LIST_XLSX, sheet="Sheet1"):
+    """Sheet1 of the shipped workbook, as get_all_values() would return it."""
+    from openpyxl import load_workbook  # Only needed offline
+    ws = load_workbook(path, read_only=True, data_only=True)[sheet]
+    rows = [["" if v is None else str(v) for v in row] for row in ws.iter_rows(values_only=True)]
+    while rows and not any(rows[-1]):
+        rows.pop()
+    return rows
+
+
+def _modified(spreadsheet):
+    """Drive modifiedTime of the spreadsheet, None when the credentials can't read it."""
+    try:
+        return spreadsheet.get_lastUpdateTime()
+    except Exception:
+        return None
+
+
+def load_symbol_list(client=None, source=SYMBOL_SOURCE, path=SNAPSHOT_FILE, max_age_hours=SNAPSHOT_MAX_AGE):
+    """
+    Sheet1 rows (header included) through a content-hashed local snapshot.
+
+    auto: reuse the snapshot while the sheet's Drive modifiedTime is unchanged
+          (or, without Drive access, while it is younger than max_age_hours);
+          otherwise read Sheet1 once and refresh the snapshot.
+    sheet: always read Sheet1. snapshot: never touch the network (shards
+    after the plan step). xlsx: the shipped workbook.
+    Falls back to the snapshot, then the xlsx, when Sheets is unreachable.
+    -> snapshot dict, rows in snap["rows"]
+    """
+    snap = load_snapshot(path)
+    if source == "snapshot":
+        if not snap:
+            raise FileNotFoundError(f"SYMBOL_SOURCE=snapshot but no valid {path}")
+        print(f"📋 Symbol list: {len(snap['rows']) - 1} rows from {path} ({snap['hash']})")
+        return snap
+    if source == "xlsx":
+        return _from_xlsx(path)
+
+    try:
+        spreadsheet = client.open_by_url(STOCK_LIST_URL)
+        modified = _modified(spreadsheet)
+        if source == "auto" and snap:
+            if modified and modified == snap.get("modified"):
+                print(f"📋 Symbol list unchanged since {modified}, using {path} ({snap['hash']})")
+                return snap
+            age = (time.time() - snap.get("fetched", 0)) / 3600
+            if not modified and age < max_age_hours:
+                print(f"📋 Symbol list: {path} is {age:.1f}h old, reusing it ({snap['hash']})")
+                return snap
+        rows = spreadsheet.worksheet("Sheet1").get_all_values()
+    except Exception as e:
+        if snap:
+            print(f"⚠️ Sheet1 unreachable ({e}), using {path} ({snap['hash']})")
+            return snap
+        print(f"⚠️ Sheet1 unreachable ({e}), falling back to {os.path.basename(STOCK_LIST_XLSX)}")
+        return _from_xlsx(path)
+
+    previous = snap["hash"] if snap else None
+    snap = save_snapshot(rows, "sheet", modified, path)
+    state = "unchanged" if previous == snap["hash"] else f"changed {previous} → {snap['hash']}" if previous else snap["hash"]
+    print(f"📋 Symbol list: {len(rows) - 1} rows from Sheet1 ({state})")
+    return snap
+
+
+def _from_xlsx(path):
+    snap = save_snapshot(read_xlsx(), "xlsx", None, path)
+    print(f"📋 Symbol list: {len(snap['rows']) - 1} rows from {os.path.basename(STOCK_LIST_XLSX)} ({snap['hash']})")
+    return snap
+
+
+def write_plan(snap, step=SHARD_STEP, mode=SHARD_MODE, path=SHARD_PLAN_FILE):
+    """Shard assignment for every data row, tied to the snapshot it was computed from."""
+    keys = [row[0] if row else "" for row in snap["rows"][1:]]
+    plan = {"hash": snap["hash"], "step": step, "mode": mode, "shards": plan_shards(keys, step, mode)}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(plan, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    sizes = ", ".join(str(len(v)) for _, v in sorted(plan["shards"].items(), key=lambda kv: int(kv[0])))
+    print(f"🗺️ {path}: {len(keys)} rows over {step} shards ({mode}) → {sizes}")
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot the Sheet1 symbol list and plan the shards once per run")
+    parser.add_argument("--source", default="sheet", choices=("auto", "sheet", "snapshot", "xlsx"))
+    parser.add_argument("--step", type=int, default=SHARD_STEP, help="Shards per range")
+    parser.add_argument("--mode", default=SHARD_MODE, choices=("stride", "hash"))
+    args = parser.parse_args(argv)
+
+    client = sheets_client() if args.source in ("auto", "sheet") else None
+    snap = load_symbol_list(client, source=args.source)
+    write_plan(snap, args.step, args.mode)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+import os
+import pytest
+from chrome_watchdog import Watchdog
+
+psutil = pytest.importorskip("psutil")
+
+
+def test_tree_memory_falls_back_to_rss_when_smaps_is_unreadable(monkeypatch):
+    watchdog = Watchdog(reap_every=0)
+    proportional = watchdog.tree_mb(os.getpid())
+
+    def denied(self):
+        raise psutil.AccessDenied(self.pid)
+
+    monkeypatch.setattr(psutil.Process, "memory_full_info", denied)
+    rss = watchdog.tree_mb(os.getpid())
+    assert 0 < proportional <= rss
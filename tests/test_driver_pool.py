@@ -0,0 +1,78 @@
+import json, subprocess
+import pytest
+import driver_pool
+from chrome_watchdog import Watchdog, DeadlineExceeded
+
+
+class Service:
+    def __init__(self):
+        self.process = subprocess.Popen(["sleep", "60"])  # Stands in for chromedriver
+
+
+class Driver:
+    hang_home = False
+
+    def __init__(self, service=None, options=None):
+        self.service = Service()
+
+    def execute_cdp_cmd(self, *a):
+        pass
+
+    def get(self, url):
+        if Driver.hang_home or url != driver_pool.TV_HOME:
+            self.service.process.wait()  # Wedged until the watchdog kills chromedriver
+            raise ConnectionError("connection reset")
+
+    def add_cookie(self, cookie):
+        pass
+
+    def refresh(self):
+        pass
+
+    def quit(self):
+        self.service.process.kill()
+        self.service.process.wait()
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(driver_pool.webdriver, "Chrome", Driver)
+    cookies = tmp_path / "cookies.json"
+    cookies.write_text(json.dumps([{"name": "s", "value": "1"}]))
+    Driver.hang_home = False
+    p = driver_pool.DriverPool(service=object(), cookies_file=str(cookies),
+                               watchdog=Watchdog(deadline=0.5, tick=0.1, reap_every=0))
+    yield p
+    p.close()
+
+
+def test_hung_page_is_killed_and_the_driver_replaced(pool):
+    with pytest.raises(DeadlineExceeded):
+        with pool.session() as d:
+            d.get("https://chart")
+    assert pool.recycled == 1
+    with pool.session() as d:
+        d.get(driver_pool.TV_HOME)
+    assert pool.started == 2
+
+
+def test_hung_cookie_login_is_under_the_deadline(pool):
+    Driver.hang_home = True
+    with pytest.raises(DeadlineExceeded):
+        with pool.session():
+            pass
+    assert pool.started == 0 and pool.watchdog.actions["deadline"] == 1
+
+
+def test_dead_chromedriver_connection_error_retires_the_slot(pool):
+    def refused(url):
+        raise ConnectionError("[Errno 111] Connection refused")  # What urllib3 raises once chromedriver died
+
+    with pytest.raises(ConnectionError):
+        with pool.session() as d:
+            d.get = refused
+            d.get("https://chart")
+    assert pool.recycled == 1 and pool.watchdog.actions["deadline"] == 0
+    with pool.session() as d:
+        d.get(driver_pool.TV_HOME)
+    assert pool.started == 2
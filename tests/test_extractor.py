@@ -0,0 +1,137 @@
+import pytest
+from types import SimpleNamespace
+from extractor import AdaptiveExtractor, pick_values, strategy_values, PANEL_STRATEGIES, SELECTORS
+from timing import TIMINGS
+
+PANEL = SELECTORS[0]
+ROW = ["1,234.5", "∅", "12.3", "−4.5%", "1.2M", "7.7", "8.8"]
+
+
+class FakeDriver:
+    """execute_script(EXTRACT_JS, selectors, extras) -> the canned payload, limited like the JS."""
+
+    def __init__(self, payload):
+        self.payload, self.calls = payload, []
+
+    def execute_script(self, js, selectors, extras):
+        self.calls.append((list(selectors), list(extras)))
+        found = self.payload.get("selectors", {})
+        return {"selectors": {s: found.get(s, []) for s in selectors},
+                **{k: self.payload.get(k, []) for k in extras}}
+
+
+@pytest.fixture(autouse=True)
+def no_events():
+    TIMINGS.events.clear()
+    yield
+    TIMINGS.events.clear()
+
+
+def test_strategy_values_drops_empties_by_default():
+    payload = {"selectors": {PANEL: ROW}}
+    assert strategy_values(payload, f"css:{PANEL}") == ["1,234.5", "12.3", "-4.5%", "1.2M", "7.7", "8.8"]
+
+
+def test_strategy_values_keeps_empty_cells_in_place():
+    payload = {"selectors": {PANEL: ROW}}
+    assert strategy_values(payload, f"css:{PANEL}", keep_empty=True) == \
+        ["1,234.5", "", "12.3", "-4.5%", "1.2M", "7.7", "8.8"]
+
+
+def test_strategy_values_extras_and_missing():
+    payload = {"numeric": [" 42 ", "x" * 30], "selectors": {}}
+    assert strategy_values(payload, "numeric") == ["42"]
+    assert strategy_values(payload, "css:.nothing") == []
+
+
+def test_pick_values_ranks_selectors_then_extras_and_pads():
+    payload = {"selectors": {PANEL: ["1", "2", "∅"], "[data-value]": ["2", "3"]},
+               "numeric": ["3", "4"], "cells": ["5", "Name"]}
+    values, found = pick_values(payload, count=8, verbose=False)
+    assert values == ["1", "2", "3", "4", "5", "N/A", "N/A", "N/A"]
+    assert found == 5
+
+
+def test_pick_values_truncates_to_count():
+    payload = {"selectors": {PANEL: [str(n) for n in range(20)]}}
+    values, found = pick_values(payload, count=14, verbose=False)
+    assert values == [str(n) for n in range(14)] and found == 20
+
+
+def test_panel_keeps_columns_with_empty_cells():
+    panel = AdaptiveExtractor("tv6", 6, mode="panel")
+    values = panel.extract(FakeDriver({"selectors": {PANEL: ["1", "∅", "∅", "4", "5", "6", "7"]}}))
+    assert values == ["1", "", "", "4", "5", "6"]
+    assert panel.winner == [f"css:{PANEL}"] and panel.drifts == 0
+
+
+def test_panel_never_falls_back_to_loose_selectors():
+    assert AdaptiveExtractor("p", 6, mode="panel").strategies == PANEL_STRATEGIES
+    page = {"selectors": {"div[class*='value']": ["Volume", "1", "2", "3", "4", "5", "6"],
+                          "[data-value]": ["9", "9", "9", "9", "9", "9"]},
+            "numeric": ["1", "2", "3", "4", "5", "6"]}
+    panel = AdaptiveExtractor("tv6", 6, mode="panel", drift_after=1)
+    values = panel.extract(FakeDriver(page))
+    assert values == [] and panel.winner is None and panel.drifts == 1
+
+
+def test_panel_rejects_text_in_value_cells():
+    panel = AdaptiveExtractor("tv6", 6, mode="panel")
+    assert not panel.valid(["1", "Apple Inc", "3", "4", "5", "6"])
+    assert not panel.valid(["", "", "", "", "", ""])
+    assert not panel.valid(["1", "2", "3"])
+    assert panel.valid(["1", "", "3", "", "5", "6"])
+
+
+def test_drift_state_machine(monkeypatch):
+    good = {"selectors": {PANEL: ["1", "2", "3", "4", "5", "6"]}}
+    moved = {"selectors": {SELECTORS[2]: ["1", "2", "3", "4", "5", "6"]}}
+    broken = {"selectors": {}}
+    symbol = SimpleNamespace(symbol="TCS")
+    monkeypatch.setattr(TIMINGS, "current", lambda: symbol)
+    panel = AdaptiveExtractor("tv6", 6, mode="panel", drift_after=2)
+
+    panel.extract(FakeDriver(good))              # First page: full search, learns the winner silently
+    assert (panel.searches, panel.fast, panel.drifts) == (1, 0, 0)
+    driver = FakeDriver(good)
+    panel.extract(driver)                        # Fast path: only the learned selector, no DOM walks
+    assert panel.fast == 1 and driver.calls == [([PANEL], [])]
+
+    panel.extract(FakeDriver(moved))             # Winner stops matching, another selector validates
+    assert panel.winner == [f"css:{SELECTORS[2]}"] and panel.drifts == 1
+    assert TIMINGS.events[-1]["kind"] == "layout_drift"
+
+    symbol.symbol = "DELISTED"                   # One bad page and its retry: no alert, winner kept
+    panel.extract(FakeDriver(broken))
+    panel.extract(FakeDriver(broken))
+    assert not panel.broken and panel.winner == [f"css:{SELECTORS[2]}"] and panel.drifts == 1
+
+    symbol.symbol = "INFY"                       # A second symbol in a row: one alert for the episode
+    panel.extract(FakeDriver(broken))
+    symbol.symbol = "SBIN"
+    panel.extract(FakeDriver(broken))
+    assert panel.broken and panel.winner is None and panel.drifts == 2
+
+    panel.extract(FakeDriver(good))              # Recovery: readable again, no new alert
+    assert not panel.broken and panel.winner == [f"css:{PANEL}"] and panel.drifts == 2
+    assert len(TIMINGS.events) == 2
+
+
+def test_a_valid_page_resets_the_failure_streak(monkeypatch):
+    symbol = SimpleNamespace(symbol="A")
+    monkeypatch.setattr(TIMINGS, "current", lambda: symbol)
+    panel = AdaptiveExtractor("tv6", 6, mode="panel", drift_after=2)
+    for name, page in (("A", {"selectors": {}}), ("B", {"selectors": {PANEL: ["1"] * 6}}), ("C", {"selectors": {}})):
+        symbol.symbol = name
+        panel.extract(FakeDriver(page))
+    assert panel.drifts == 0 and panel.winner == [f"css:{PANEL}"]
+
+
+def test_merge_mode_learns_the_strategies_that_filled_the_row():
+    page = {"selectors": {PANEL: [str(n) for n in range(10)]}, "numeric": [str(n) for n in range(10, 14)],
+            "cells": []}
+    values = AdaptiveExtractor("tv14", 14).extract(FakeDriver(page))
+    assert values == [str(n) for n in range(14)]
+    ex = AdaptiveExtractor("tv14", 14)
+    ex.extract(FakeDriver(page))
+    assert ex.winner == [f"css:{PANEL}", "numeric"]
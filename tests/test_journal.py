@@ -0,0 +1,37 @@
+import json
+from journal import Journal
+
+
+def test_pending_rows_survive_a_restart(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    j = Journal(path, version="abc", day="2026-10-17")
+    j.record(0, 2, ["A"])
+    j.record(1, 3, ["B"])
+    j.flushed(0)
+    j.close()
+    again = Journal(path, version="abc", day="2026-10-17")
+    assert again.scraped() == {0, 1} and again.pending() == [(1, 3, ["B"])]
+    again.close()
+
+
+def test_journal_of_another_snapshot_or_day_is_set_aside(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    j = Journal(str(path), version="abc", day="2026-10-16")
+    j.record(0, 2, ["A"])
+    j.close()
+    for version, day in (("abc", "2026-10-17"), ("def", "2026-10-16")):
+        fresh = Journal(str(path), version=version, day=day)
+        assert fresh.scraped() == set() and fresh.pending() == []
+        fresh.close()
+    assert (tmp_path / "journal.jsonl.stale").exists()
+    assert json.loads(path.read_text().splitlines()[0]) == {"header": {"hash": "def", "date": "2026-10-16"}}
+
+
+def test_finish_rotates_only_a_fully_flushed_journal(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    j = Journal(str(path), version="abc")
+    j.record(0, 2, ["A"])
+    assert not j.finish() and path.exists()
+    j = Journal(str(path), version="abc")
+    j.flushed(0)
+    assert j.finish() and not path.exists() and (tmp_path / "journal.jsonl.done").exists()
@@ -0,0 +1,72 @@
+import json
+from llm_batch import RateScheduler, analyze_batch, analyze_scopes, parse_reset, parse_results
+
+ITEMS = [("TCS", "IT", "Software"), ("SBIN", "Banks", "Finance")]
+
+
+def answer(items):
+    return json.dumps({"results": [{"symbol": s, "sector": "X", "scope": "Y"} for s, _, _ in items]})
+
+
+def test_parse_reset():
+    assert parse_reset("7.66s") == 7.66
+    assert parse_reset("2m59.56s") == 179.56
+    assert parse_reset("120ms") == 0.12
+    assert parse_reset("1h2m") == 3720
+    assert parse_reset("") is None and parse_reset("soon") is None
+
+
+def test_parse_results_keeps_requested_symbols_only():
+    text = json.dumps({"results": [{"symbol": "tcs", "sector": "IT"}, {"symbol": "OTHER", "sector": "Z"}]})
+    assert parse_results(text, ITEMS) == {"TCS": ("IT", "N/A")}
+
+
+def test_token_usage_is_settled_without_header_counts():
+    sched = RateScheduler(rpm=100, tpm=1000)
+    sched.reserve(300)
+    sched.settle(300, 100)
+    assert sched.tok_left == 900 and sched.tokens_used == 100 and sched.calls == 1
+
+
+def test_header_counts_win_over_the_estimate():
+    sched = RateScheduler(rpm=100, tpm=1000)
+    sched.reserve(300)
+    synced = sched.update({"x-ratelimit-remaining-tokens": "500", "x-ratelimit-reset-tokens": "10s"})
+    sched.settle(300, 100, from_headers=synced)
+    assert synced and sched.tok_left == 500
+
+
+def test_request_headers_are_the_daily_quota():
+    sched = RateScheduler(rpm=30, tpm=1000)
+    sched.update({"x-ratelimit-limit-requests": "14400", "x-ratelimit-remaining-requests": "14399",
+                  "x-ratelimit-reset-requests": "6s"})
+    assert sched.rpm == 30 and sched.day_left == 14399 and not sched.day_exhausted()
+    sched.update({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2h"})
+    assert sched.day_exhausted()
+
+
+def test_exhausted_day_stops_without_calling_the_model():
+    calls = []
+
+    def llm(messages):
+        calls.append(messages)
+        return answer(ITEMS), {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "3h"}, 50
+
+    sched = RateScheduler(rpm=100, tpm=100000)
+    assert analyze_batch(ITEMS, llm, sched) == {"TCS": ("X", "Y"), "SBIN": ("X", "Y")}
+    assert analyze_batch(ITEMS, llm, sched) == {"TCS": ("RETRY_LATER", "Limit hit"), "SBIN": ("RETRY_LATER", "Limit hit")}
+    assert len(calls) == 1
+
+
+def test_scopes_are_asked_per_symbol_and_blank_ones_stay_blank():
+    prompts = []
+
+    def llm(messages):
+        rows = json.loads(messages[-1]["content"].split("\n", 1)[1])
+        prompts.append(rows)
+        return json.dumps({"results": [{"symbol": r["symbol"], "scope": "Loans" if r["symbol"] == "SBIN" else ""}
+                                       for r in rows]}), {}, 50
+
+    scopes = analyze_scopes([("TCS", "IT"), ("SBIN", "Bank")], llm, RateScheduler(rpm=1000, tpm=100000), max_tries=2)
+    assert scopes == {"SBIN": "Loans", "TCS": ""}
+    assert prompts[0] == [{"symbol": "TCS", "sector": "IT"}, {"symbol": "SBIN", "sector": "Bank"}]
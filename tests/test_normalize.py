@@ -0,0 +1,42 @@
+import json
+import math
+import pytest
+from normalize import to_numbers, normalize_rows, value_columns, write_typed
+
+COLUMNS = ["close", "change"]
+
+
+def test_to_numbers_suffixes_minus_and_missing():
+    numbers, pct, unparsed = to_numbers(["1.23K", "−4.5%", "∅", "N/A", "1,234.5", "12 Cr", "abc"])
+    assert list(numbers[:2]) == [1230.0, -4.5]
+    assert math.isnan(numbers[2]) and math.isnan(numbers[3])
+    assert numbers[4] == 1234.5 and numbers[5] == 12e7
+    assert list(pct) == [False, True, False, False, False, False, False]
+    assert list(unparsed) == [False] * 6 + [True]
+
+
+def test_percent_columns_keep_their_name_in_every_shard():
+    with_pct = normalize_rows([["TCS", "d", "100", "1.5%"]], COLUMNS)
+    all_na = normalize_rows([["INFY", "d", "200", "N/A"]], COLUMNS)
+    assert list(with_pct.columns) == list(all_na.columns) == ["symbol", "date", "close", "change"]
+    assert with_pct.attrs["units"] == {"change": "percent"} and all_na.attrs["units"] == {}
+
+
+def test_value_columns():
+    assert value_columns(["Perf.W", "close"], 3) == ["Perf_W", "close", "v3"]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_write_typed_records_units(tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    path = write_typed([["TCS", "d", "100", "1.5%"], ["INFY", "d", "N/A", "-2%"]], COLUMNS, "tv6", fmt=fmt,
+                       out_dir=str(tmp_path))
+    if fmt == "feather":
+        from pyarrow import feather
+        table = feather.read_table(path)
+    else:
+        from pyarrow import parquet
+        table = parquet.read_table(path)
+    assert table.column_names == ["symbol", "date", "close", "change"]
+    assert json.loads(table.schema.metadata[b"mv2_units"]) == {"change": "percent"}
+    assert table.column("change").to_pylist() == [1.5, -2.0]
@@ -0,0 +1,59 @@
+import pytest
+from nse_client import NSEClient
+
+
+class Resp:
+    def __init__(self, body, status=200):
+        self.body, self.status_code = body, status
+
+    def json(self):
+        if isinstance(self.body, Exception):
+            raise self.body
+        return self.body
+
+
+class Session:
+    def __init__(self, body, status=200, fail_home=False):
+        self.body, self.status, self.fail_home = body, status, fail_home
+        self.headers = {}
+
+    def mount(self, *a):
+        pass
+
+    def get(self, url, **kwargs):
+        if url.endswith("/"):
+            if self.fail_home:
+                raise ConnectionError("down")
+            return Resp("")
+        return Resp(self.body, self.status)
+
+
+def client(body, **kwargs):
+    return NSEClient(base_url="http://nse", rps=1000, session=Session(body, **kwargs))
+
+
+@pytest.mark.parametrize("body", [["x"], "oops", None, {"info": None}, {"info": []}, {"info": {"industry": 5}},
+                                  {"info": {"industry": "  "}}, ValueError("not json")])
+def test_malformed_bodies_are_no_data(body):
+    nse = client(body)
+    assert nse.fetch_sectors(["TCS", "INFY"]) == {"TCS": None, "INFY": None}
+
+
+def test_industry_then_sector():
+    assert client({"info": {"industry": "IT - Software "}}).sector("TCS") == "IT - Software"
+    assert client({"info": {"sector": "Banks"}}).sector("SBIN") == "Banks"
+
+
+def test_throttled_counts_429():
+    nse = client({}, status=429)
+    nse.fetch_sectors(["A", "B", "C"])
+    assert nse.calls == 3 and nse.throttled == 3
+
+
+def test_failed_prime_is_retried():
+    nse = client({"info": {"industry": "IT"}}, fail_home=True)
+    nse.prime()
+    assert nse.primed_at == 0.0 and nse.primes == 0
+    nse.session.fail_home = False
+    nse.prime()
+    assert nse.primed_at > 0 and nse.primes == 1
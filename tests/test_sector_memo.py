@@ -0,0 +1,64 @@
+from sector_memo import SectorMemo, plan, pair_key, normalize_sector, memoizable
+
+
+def memo(tmp_path):
+    return SectorMemo(str(tmp_path / "memo.json"))
+
+
+def test_normalize_sector_synonyms_and_blanks():
+    assert normalize_sector("BANKING") == normalize_sector("Banks ") == "bank"
+    for blank in ("", "N/A", "NO_DATA", "Error", None):
+        assert normalize_sector(blank) == ""
+
+
+def test_pair_key_is_order_free():
+    assert pair_key("Banks", "Finance") == pair_key("finance", "BANKS")
+
+
+def test_blank_pairs_have_no_key():
+    for b, c in (("", "N/A"), ("NO_DATA", "Error"), ("Banks", ""), ("N/A", "Pharma")):
+        assert pair_key(b, c) is None
+
+
+def test_blank_pairs_are_never_grouped(tmp_path):
+    rows = [(2, "TCS", "", "N/A"), (3, "HDFCBANK", "NO_DATA", "Error"), (4, "SUNPHARMA", "Error", ""),
+            (5, "SBIN", "Banks", ""), (6, "ICICIBANK", "", "Bank")]
+    resolved, groups = plan(rows, memo(tmp_path))
+    assert resolved == {}
+    assert sorted(len(members) for members in groups.values()) == [1] * 5
+    assert not any(memoizable(key) for key in groups)
+
+
+def test_blank_pairs_are_never_memoized(tmp_path):
+    m = memo(tmp_path)
+    _, groups = plan([(2, "TCS", "", "N/A")], m)
+    (key,) = groups
+    m.put(key, "Information Technology")
+    m.put("|", "Information Technology")
+    assert m.entries == {}
+    _, groups = plan([(3, "HDFCBANK", "NO_DATA", "")], m)
+    assert list(groups.values()) == [[(3, "HDFCBANK", "NO_DATA", "")]]
+
+
+def test_pairs_share_the_sector_but_not_the_scope(tmp_path):
+    m = memo(tmp_path)
+    rows = [(2, "HDFCBANK", "Banks", "Finance"), (3, "ICICIBANK", "Finance", "BANKING")]
+    resolved, groups = plan(rows, m)
+    assert resolved == {} and list(groups.values()) == [rows]
+    m.put(pair_key("Banks", "Finance"), "Bank")
+    m.save()
+    resolved, groups = plan([(4, "AXISBANK", "Banks", "Finance")], SectorMemo(m.path))
+    assert resolved == {4: "Bank"} and groups == {}
+
+
+def test_agreeing_pairs_resolve_locally(tmp_path):
+    resolved, groups = plan([(2, "TCS", "IT", "Information Technology")], memo(tmp_path))
+    assert resolved == {2: "IT"} and groups == {}
+
+
+def test_blank_pairs_from_older_memos_are_dropped(tmp_path):
+    path = tmp_path / "memo.json"
+    path.write_text('{"|": {"sector": "IT", "scope": "x", "ts": 0}, "|bank": {"sector": "Bank", "scope": "y", "ts": 0},'
+                    ' "bank|finance": {"sector": "Bank", "scope": "z", "ts": 0}}', encoding="utf-8")
+    m = SectorMemo(str(path))
+    assert list(m.entries) == ["bank|finance"] and m.get("bank|finance") == "Bank"
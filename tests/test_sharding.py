@@ -0,0 +1,62 @@
+from retry_queue import RetryQueue
+from sharding import LeaseShard, Shard, SQLiteLeaseStore, lease_table, plan_shards
+
+ROWS = [(i, [f"SYM{i}", "", "", f"https://x/chart/?symbol=NSE%3ASYM{i}"]) for i in range(10)]
+
+
+def owners(store):
+    return dict(store.db.execute("SELECT i, owner FROM leases WHERE owner IS NOT NULL").fetchall())
+
+
+def test_static_shard_takes_its_stride():
+    assert [i for i, _ in Shard(index=1, step=3).jobs(ROWS)] == [1, 4, 7]
+
+
+def test_plan_covers_every_row_once():
+    plan = plan_shards([row[0] for _, row in ROWS], 3, "hash")
+    assert sorted(i for rows in plan.values() for i in rows) == list(range(10))
+
+
+def test_leases_are_claimed_one_row_at_a_time(tmp_path):
+    store = SQLiteLeaseStore(str(tmp_path / "leases.db"))
+    jobs = LeaseShard(store, index=0, step=2).jobs(ROWS)
+    assert owners(store) == {}
+    first = next(jobs)
+    assert first[0] == 0 and list(owners(store)) == [0]
+    next(jobs)
+    assert sorted(owners(store)) == [0, 2]
+
+
+def test_other_shard_keeps_its_rows_until_stolen(tmp_path):
+    path = str(tmp_path / "leases.db")
+    a = LeaseShard(SQLiteLeaseStore(path), index=0, step=2, owner="a")
+    b = LeaseShard(SQLiteLeaseStore(path), index=1, step=2, owner="b")
+    ja, jb = a.jobs(ROWS), b.jobs(ROWS)
+    for _ in range(5):
+        i, _ = next(ja)
+        a.done(i)
+    assert next(jb)[0] == 1                   # b's own stride is still free
+    assert next(ja)[0] in (3, 5, 7, 9) and a.stolen == 1
+
+
+def test_lease_tables_are_per_snapshot_and_run(tmp_path):
+    path = str(tmp_path / "leases.db")
+    first = LeaseShard(SQLiteLeaseStore(path, lease_table("leases", "abc123", "20261016")), index=0, step=1)
+    for i, _ in first.jobs(ROWS):
+        first.done(i)
+    assert lease_table("leases", "abc123", "20261016") == "leases_abc123_20261016"
+    for version, run in (("abc123", "20261017"), ("def456", "20261016")):
+        again = LeaseShard(SQLiteLeaseStore(path, lease_table("leases", version, run)), index=0, step=1)
+        assert [i for i, _ in again.jobs(ROWS)] == list(range(10))
+
+
+def test_rows_parked_for_a_retry_keep_their_lease(tmp_path):
+    path = str(tmp_path / "leases.db")
+    a = LeaseShard(SQLiteLeaseStore(path), index=0, step=1, ttl=0, owner="a")
+    b = LeaseShard(SQLiteLeaseStore(path), index=0, step=1, ttl=60, owner="b")
+    i, job = next(a.jobs(ROWS[:1]))
+    retry = RetryQueue(attempts=1, base_delay=0, keep=a.renew)
+    a.ttl = 60
+    retry.add(i, job, [])                     # Parking renews the lease a claimed with ttl=0
+    assert list(b.jobs(ROWS[:1])) == []
+    assert list(retry.drain(lambda job: ["1"], failed=lambda v: not any(v))) == [(job, ["1"])]
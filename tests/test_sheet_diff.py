@@ -0,0 +1,68 @@
+from sheet_diff import RowDiff, col_index, col_letter
+from sheet_writer import SheetWriter
+from ratelimit import TokenBucket
+
+OLD = ["TCS", "01/01/2026", "1", "2", "3"]
+TODAY = "10/17/2026"
+
+
+class Sheet:
+    title = "Sheet5"
+
+    def __init__(self, fail=0):
+        self.fail, self.data = fail, []
+
+    def batch_update(self, data, **kwargs):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("500")
+        self.data.append(data)
+
+
+def writer(sheet, diff):
+    return SheetWriter(sheet, linger=0, bucket=TokenBucket(1000, capacity=100), max_retries=0, diff=diff)
+
+
+def test_columns():
+    assert [col_letter(i) for i in (0, 15, 25, 26)] == ["A", "P", "Z", "AA"] and col_index("AB") == 27
+
+
+def test_default_keeps_the_date_as_last_scraped():
+    diff = RowDiff({5: list(OLD)}, date_col=1)
+    assert diff.date_policy == "always"
+    assert diff.changes(5, ["TCS", TODAY, "1", "2", "3"]) == [("B", [TODAY])]
+    assert diff.changes(5, ["TCS", TODAY, "1", "9", "3"]) == [("B", [TODAY]), ("D", ["9"])]
+
+
+def test_changed_policy_moves_the_date_only_with_values():
+    diff = RowDiff({5: list(OLD)}, date_col=1, date_policy="changed")
+    assert diff.changes(5, ["TCS", TODAY, "1", "2", "3"]) == []
+    assert diff.changes(5, ["TCS", TODAY, "1", "2", "4"]) == [("B", [TODAY]), ("E", ["4"])]
+
+
+def test_new_rows_are_written_whole():
+    assert RowDiff({}, date_col=1).changes(7, ["X", TODAY, "1"]) == [("A", ["X", TODAY, "1"])]
+
+
+def test_unchanged_rows_are_done_without_a_write():
+    diff, sheet, done = RowDiff({5: list(OLD)}, date_col=1), Sheet(), []
+    w = writer(sheet, diff)
+    w.put(5, list(OLD), on_done=lambda: done.append(5))
+    w.close()
+    assert sheet.data == [] and done == [5]
+
+
+def test_failed_write_is_retried_by_the_next_identical_put():
+    diff, sheet = RowDiff({5: list(OLD)}, date_col=1), Sheet(fail=1)
+    w = writer(sheet, diff)
+    row = ["TCS", TODAY, "1", "9", "3"]
+    w.put(5, row)
+    w.flush()
+    assert sheet.data == [] and diff.current[5] == OLD   # Nothing landed, nothing cached
+    w.put(5, row)
+    w.flush()
+    assert sheet.data == [[{"range": "B5", "values": [[TODAY]]}, {"range": "D5", "values": [["9"]]}]]
+    assert diff.current[5] == row
+    w.put(5, row)
+    w.close()
+    assert len(sheet.data) == 1
@@ -0,0 +1,178 @@
+import os, json, time, atexit, threading
+from contextlib import contextmanager
+
+# ---------------- CONFIG ---------------- #
+TIMINGS_FILE     = os.getenv("TIMINGS_FILE", "timings.jsonl")         # One line per symbol
+RUN_SUMMARY_FILE = os.getenv("RUN_SUMMARY_FILE", "run_summary.json")  # Percentiles + rates per run
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class Record:
+    """Phase times for one symbol. Phases timed inside the `with` are part of its wall time."""
+
+    def __init__(self, symbol, **extra):
+        self.symbol, self.extra = symbol, extra
+        self.phases, self.ok, self.error = {}, True, None
+        self.t0, self.carried = time.monotonic(), 0.0
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def carry(self, name, seconds):
+        """Time spent on this symbol before its record was opened (e.g. a shared batch call)."""
+        self.add(name, seconds)
+        self.carried += seconds
+
+    def fail(self, error):
+        self.ok, self.error = False, str(error)[:200]
+
+
+class Timings:
+    """
+    Per-phase timing for the pipelines.
+
+        TIMINGS.start_run("etmoney")
+        with TIMINGS.symbol("RELIANCE") as rec:
+            with TIMINGS.phase("page_load"):
+                driver.get(url)
+
+    phase() called on a thread with an open symbol record is charged to that
+    symbol; every phase also feeds the run-wide percentiles. Each finished
+    symbol is appended to TIMINGS_FILE, write_summary() writes RUN_SUMMARY_FILE.
+    """
+
+    def __init__(self, path=TIMINGS_FILE, summary_path=RUN_SUMMARY_FILE):
+        self.path, self.summary_path = path, summary_path
+        self.pipeline = "run"
+        self.samples = {}  # phase -> [seconds]
+        self.runs = {}     # pipeline -> {"start", "end", "rows", "failures", "latency": [...]}
+        self.gauges = {}   # name -> {"last", "min", "max"}, e.g. the adaptive request rates
+        self.events = []   # Things a human should look at, e.g. layout drift
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._f = None
+        self._atexit = False
+
+    def start_run(self, pipeline):
+        with self._lock:
+            self.pipeline = pipeline
+            self.runs.setdefault(pipeline, {"start": time.time(), "end": time.time(),
+                                            "rows": 0, "failures": 0, "latency": []})
+            if not self._atexit:
+                atexit.register(self.write_summary)  # Crashed runs still leave a summary
+                self._atexit = True
+
+    @contextmanager
+    def symbol(self, symbol, **extra):
+        rec, prev = Record(symbol, **extra), getattr(self._local, "rec", None)
+        self._local.rec = rec
+        try:
+            yield rec
+        except Exception as e:
+            rec.fail(e)
+            raise
+        finally:
+            self._local.rec = prev
+            self._finish(rec)
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.monotonic() - t0)
+
+    def add_phase(self, name, seconds):
+        rec = getattr(self._local, "rec", None)
+        if rec is not None:
+            rec.add(name, seconds)
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def gauge(self, name, value):
+        with self._lock:
+            g = self.gauges.setdefault(name, {"last": value, "min": value, "max": value})
+            g["last"], g["min"], g["max"] = value, min(g["min"], value), max(g["max"], value)
+
+    def event(self, kind, **info):
+        with self._lock:
+            self.events.append({"ts": round(time.time(), 3), "pipeline": self.pipeline, "kind": kind, **info})
+
+    def current(self):
+        """The symbol record open on this thread, or None."""
+        return getattr(self._local, "rec", None)
+
+    def fail(self, error):
+        """Mark the symbol open on this thread as failed (no-op outside symbol())."""
+        rec = getattr(self._local, "rec", None)
+        if rec is not None:
+            rec.fail(error)
+
+    def _finish(self, rec):
+        total = time.monotonic() - rec.t0 + rec.carried
+        line = {"ts": round(time.time(), 3), "pipeline": self.pipeline, "symbol": rec.symbol,
+                "ok": rec.ok, "total": round(total, 4),
+                "phases": {k: round(v, 4) for k, v in rec.phases.items()}, **rec.extra}
+        if rec.error:
+            line["error"] = rec.error
+        with self._lock:
+            run = self.runs.setdefault(self.pipeline, {"start": time.time(), "end": time.time(),
+                                                       "rows": 0, "failures": 0, "latency": []})
+            run["rows"] += 1
+            run["failures"] += 0 if rec.ok else 1
+            run["latency"].append(total)
+            run["end"] = time.time()
+            try:
+                if self._f is None:
+                    self._f = open(self.path, "a", encoding="utf-8")
+                self._f.write(json.dumps(line, ensure_ascii=False) + "\n")
+                self._f.flush()
+            except OSError as e:
+                print(f"⚠️ Timings: {e}")
+
+    def summary(self):
+        with self._lock:
+            runs = {}
+            for name, r in self.runs.items():
+                minutes = max(r["end"] - r["start"], 1e-9) / 60
+                runs[name] = {
+                    "rows": r["rows"], "failures": r["failures"],
+                    "seconds": round(r["end"] - r["start"], 1),
+                    "rows_per_min": round(r["rows"] / minutes, 1) if r["rows"] else 0.0,
+                    "p50": round(percentile(r["latency"], 50), 3),
+                    "p95": round(percentile(r["latency"], 95), 3),
+                }
+            phases = {name: {"n": len(v), "total": round(sum(v), 2), "p50": round(percentile(v, 50), 3),
+                             "p95": round(percentile(v, 95), 3), "max": round(max(v), 3)}
+                      for name, v in sorted(self.samples.items()) if v}
+            gauges = {name: {k: round(v, 3) for k, v in g.items()} for name, g in sorted(self.gauges.items())}
+            events = list(self.events)
+        return {"written": time.strftime("%Y-%m-%dT%H:%M:%S"), "runs": runs, "phases": phases, "gauges": gauges,
+                "events": events}
+
+    def write_summary(self):
+        summary = self.summary()
+        if not summary["runs"] and not summary["phases"]:
+            return summary
+        tmp = self.summary_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            os.replace(tmp, self.summary_path)
+        except OSError as e:
+            print(f"⚠️ Run summary: {e}")
+            return summary
+        for name, r in summary["runs"].items():
+            print(f"📊 {name}: {r['rows']} rows, {r['failures']} failed, {r['rows_per_min']} rows/min "
+                  f"| p50 {r['p50']}s p95 {r['p95']}s → {self.summary_path}")
+        return summary
+
+
+TIMINGS = Timings()